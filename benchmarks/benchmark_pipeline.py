@@ -0,0 +1,251 @@
+"""End-to-end benchmark of the processing pipeline on synthetic videos.
+
+Test videos are generated once with ffmpeg's lavfi sources (testsrc2 + sine) in
+several resolutions, durations and containers and reused by later runs. Every run
+processes fresh copies (hard links where possible) so no artifact is skipped.
+
+Network stages are stubbed: R18.dev always resolves, ClearJAV never reports
+duplicates and uploads are dropped, so timings only cover local work.
+
+    python benchmarks/benchmark_pipeline.py                 # run and save to benchmarks/results/
+    python benchmarks/benchmark_pipeline.py --workers 4 --repeat 3
+    python benchmarks/benchmark_pipeline.py --compare OLD.json NEW.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metadata_core import VideoProcessor, ProbeCache, RunLog, CpuBudget, JobJournal, DuplicateIndex, R18Cache, MIB, percentile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+VIDEO_DIR = os.path.join(BENCHMARK_DIR, "videos")
+WORK_DIR = os.path.join(BENCHMARK_DIR, "work")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+# (content ID used as file name, resolution, duration in seconds, container)
+VIDEO_MATRIX = [
+    ("BENCH-001", "854x480", 30, "mp4"),
+    ("BENCH-002", "1280x720", 60, "mkv"),
+    ("BENCH-003", "1920x1080", 60, "mp4"),
+    ("BENCH-004", "1920x1080", 180, "mkv"),
+    ("BENCH-005", "1280x720", 60, "wmv"),
+]
+CONTAINER_CODECS = {
+    "mp4": ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-c:a", "aac"],
+    "mkv": ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-c:a", "aac"],
+    "wmv": ["-c:v", "wmv2", "-b:v", "4M", "-c:a", "wmav2"],
+}
+FALLBACK_VIDEO_CODEC = ["-c:v", "mpeg4", "-q:v", "3"]  # For ffmpeg builds without libx264
+STAGES = ("mediainfo", "contact_sheet", "screenshots", "torrent")
+
+class BenchmarkProcessor(VideoProcessor):
+    """VideoProcessor with stubbed network calls and a quiet log.
+
+    Every cache and journal lives under work_dir, so BENCH-* entries never reach the
+    user's cache/ folder (where a fake queued upload would show up as a duplicate).
+    """
+
+    def __init__(self, work_dir, verbose=False):
+        super().__init__()
+        self.work_dir = work_dir
+        self.verbose = verbose
+        self.probe_cache = ProbeCache(os.path.join(work_dir, "probe_cache.sqlite"))
+        self.job_journal = JobJournal(os.path.join(work_dir, "job_journal.sqlite"))
+        self.duplicate_index = DuplicateIndex(os.path.join(work_dir, "duplicate_index.sqlite"))
+        self.duplicate_index.record_queued = lambda *args, **kwargs: None
+        self.r18_cache = R18Cache(os.path.join(work_dir, "r18_cache.sqlite"))
+        self.user_data = {'username': 'benchmark', 'group': 'user'}
+        self.auto_upload.set(True)
+        self.generate_screenshots.set(True)
+        self.tracker_url.set("https://tracker.invalid/announce")
+        self.upload_outbox.enqueue = lambda *args, **kwargs: None
+
+    def log_message(self, message):
+        if self.verbose:
+            print(message)
+
+    def start_run_log(self):
+        super().start_run_log()
+        self.run_log = RunLog(os.path.join(self.work_dir, "runs"))
+
+    def fetch_r18_data(self, jav_id):
+        return jav_id, "2024-01-01", True
+
+    def check_for_duplicates(self, dvd_id, empty_fetched_after=None):
+        return []
+
+    def reset_probe_cache(self):
+        """Drops cached probes so every measurement includes the mediainfo/ffprobe calls."""
+        self.probe_cache = ProbeCache(os.path.join(self.work_dir, f"probe_cache_{time.time_ns()}.sqlite"))
+
+def generate_videos(ffmpeg, matrix):
+    """Creates the missing synthetic videos and returns their paths."""
+    os.makedirs(VIDEO_DIR, exist_ok=True)
+    paths = []
+    for name, resolution, duration, container in matrix:
+        path = os.path.join(VIDEO_DIR, f"{name}.{container}")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        print(f"Generating {os.path.basename(path)} ({resolution}, {duration}s)...")
+        sources = ["-f", "lavfi", "-i", f"testsrc2=size={resolution}:rate=30:duration={duration}",
+                   "-f", "lavfi", "-i", f"sine=frequency=1000:duration={duration}"]
+        command = [ffmpeg, "-y", "-v", "error"] + sources + CONTAINER_CODECS[container] + ["-shortest", path]
+        if subprocess.run(command, capture_output=True).returncode != 0:
+            codecs = FALLBACK_VIDEO_CODEC + CONTAINER_CODECS[container][CONTAINER_CODECS[container].index("-c:a"):]
+            subprocess.run([ffmpeg, "-y", "-v", "error"] + sources + codecs + ["-shortest", path], check=True, capture_output=True)
+    return paths
+
+def link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def fresh_folder(videos, name):
+    """Returns a new work folder holding links to the test videos and no artifacts."""
+    folder = os.path.join(WORK_DIR, name)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    for video in videos:
+        link_or_copy(video, os.path.join(folder, os.path.basename(video)))
+    return folder
+
+def benchmark_pipeline(processor, videos, workers, repeat):
+    """Runs run_bulk_generation over the whole set and returns throughput and per-stage timings."""
+    total_bytes = sum(os.path.getsize(video) for video in videos)
+    runs = []
+    for iteration in range(repeat):
+        processor.reset_probe_cache()
+        processor.input_path.set(fresh_folder(videos, f"pipeline_{iteration}"))
+        processor.bulk_workers.set(str(workers))
+        started = time.perf_counter()
+        success = processor.run_bulk_generation()
+        elapsed = time.perf_counter() - started
+        if not success:
+            raise RuntimeError("Pipeline run failed; rerun with --verbose for the log")
+        runs.append({'seconds': round(elapsed, 3), 'stages': processor.run_log.summary()})
+    seconds = [run['seconds'] for run in runs]
+    best = min(seconds)
+    return {
+        'workers': workers,
+        'files': len(videos),
+        'bytes': total_bytes,
+        'seconds_p50': percentile(seconds, 0.5),
+        'seconds_best': best,
+        'files_per_min': round(len(videos) / best * 60, 2),
+        'mb_per_s': round(total_bytes / MIB / best, 2),
+        'stages': runs[seconds.index(best)]['stages'],
+    }
+
+def benchmark_stages(processor, videos, repeat):
+    """Times each generator on its own, with a cold probe cache, for every test video."""
+    results = {}
+    for video in videos:
+        per_stage = {stage: [] for stage in STAGES}
+        for iteration in range(repeat):
+            folder = fresh_folder([video], f"stages_{iteration}")
+            source = os.path.join(folder, os.path.basename(video))
+            base = os.path.splitext(source)[0]
+            calls = {
+                "mediainfo": lambda: processor._generate_mediainfo(source, base + ".txt", os.path.basename(source)),
+                "contact_sheet": lambda: processor._generate_contact_sheet(source, base + "_s.jpg"),
+                "screenshots": lambda: processor._generate_screenshots(source, base),
+                "torrent": lambda: processor._create_torrent(source, base + ".torrent"),
+            }
+            for stage in STAGES:
+                processor.reset_probe_cache()
+                started = time.perf_counter()
+                calls[stage]()
+                per_stage[stage].append(time.perf_counter() - started)
+        size = os.path.getsize(video)
+        results[os.path.basename(video)] = {
+            stage: {'seconds': round(min(times), 3), 'mb_per_s': round(size / MIB / min(times), 2)}
+            for stage, times in per_stage.items()
+        }
+    return results
+
+def print_results(results):
+    pipeline = results['pipeline']
+    print(f"\nPipeline: {pipeline['files']} files, {pipeline['bytes'] / MIB:.1f} MiB, {pipeline['workers']} worker(s)")
+    print(f"  best {pipeline['seconds_best']:.2f}s  p50 {pipeline['seconds_p50']:.2f}s  "
+          f"{pipeline['files_per_min']:.1f} files/min  {pipeline['mb_per_s']:.1f} MB/s")
+    print(f"\n{'Video':<16}" + "".join(f"{stage:>16}" for stage in STAGES) + "   (seconds / MB/s)")
+    for video, stages in results['stages'].items():
+        print(f"{video:<16}" + "".join(f"{stages[s]['seconds']:>8.2f}{stages[s]['mb_per_s']:>8.1f}" for s in STAGES))
+
+def compare_results(old_path, new_path):
+    """Prints the change between two saved results; negative time deltas are improvements."""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    def change(before, after):
+        return f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+
+    print(f"Comparing {os.path.basename(old_path)} -> {os.path.basename(new_path)}")
+    for key in ('files_per_min', 'mb_per_s', 'seconds_best'):
+        before, after = old['pipeline'][key], new['pipeline'][key]
+        print(f"  {key:<28}{before:>10}{after:>10}  {change(before, after)}")
+    for stage in sorted(set(old['pipeline']['stages']) & set(new['pipeline']['stages'])):
+        before, after = old['pipeline']['stages'][stage]['p50_ms'], new['pipeline']['stages'][stage]['p50_ms']
+        print(f"  {stage + ' p50 ms':<28}{before:>10}{after:>10}  {change(before, after)}")
+    for video in sorted(set(old['stages']) & set(new['stages'])):
+        for stage in STAGES:
+            before, after = old['stages'][video][stage]['seconds'], new['stages'][video][stage]['seconds']
+            print(f"  {video + ' ' + stage:<28}{before:>8}{after:>8}  {change(before, after)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline on synthetic videos")
+    parser.add_argument("--workers", type=int, default=1, help="files processed in parallel in the pipeline run")
+    parser.add_argument("--cpu-budget", type=int, help="cores shared by the external tools (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="repetitions; the fastest run is reported")
+    parser.add_argument("--skip-stages", action="store_true", help="only run the full pipeline, not each stage on its own")
+    parser.add_argument("--output", help="where to save the results (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved results and exit")
+    parser.add_argument("--verbose", action="store_true", help="print the processing log")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare_results(*args.compare)
+        return 0
+
+    os.makedirs(WORK_DIR, exist_ok=True)
+    processor = BenchmarkProcessor(WORK_DIR, verbose=args.verbose)
+    if args.cpu_budget:
+        processor.cpu_budget = CpuBudget(args.cpu_budget)
+    missing_tools = processor.resolve_tools()
+    if missing_tools:
+        print(f"error: required tools not found: {', '.join(missing_tools)}", file=sys.stderr)
+        return 3
+
+    videos = generate_videos(processor.tool_paths['ffmpeg'], VIDEO_MATRIX)
+    results = {
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'cpu_budget': processor.cpu_budget.cores,
+        'tools': {tool: info['version'] for tool, info in processor.tool_info.items()},
+        'pipeline': benchmark_pipeline(processor, videos, args.workers, args.repeat),
+        'stages': {} if args.skip_stages else benchmark_stages(processor, videos, args.repeat),
+    }
+    print_results(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Headless command-line entry point of the Torrent Metadata Creator.
+
+Runs the same pipeline as the GUI without loading customtkinter/tkinterdnd2.
+Options default to settings.ini; command-line flags override them for this run only.
+
+Exit status: 0 all files processed, 1 one or more files or uploads failed, 2 usage error,
+3 required tools missing, 4 API key rejected, 5 uploads still queued.
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+from metadata_core import (VideoProcessor, CpuBudget, print_piece_length_benchmark, PIECE_LENGTH_CHOICES,
+                           TORRENT_HASH_WORKERS, MIB, WATCH_STABLE_SECONDS)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_MISSING_TOOLS = 3
+EXIT_AUTH = 4
+EXIT_UPLOADS_PENDING = 5
+
+class HeadlessProcessor(VideoProcessor):
+    """VideoProcessor that answers the interactive dialogs from command-line options."""
+
+    def __init__(self, on_duplicate="skip", resume=True):
+        super().__init__()
+        self.on_duplicate = on_duplicate
+        self.resume = resume
+
+    def _show_duplicate_confirmation_dialog(self, dvd_id, duplicates):
+        """Proceeds or skips according to --on-duplicate."""
+        for torrent in duplicates:
+            self.log_message(f"    - Existing: {torrent.get('attributes', {}).get('name', torrent.get('name', 'Unknown'))}")
+        return self.on_duplicate == "proceed"
+
+    def _show_manual_input_dialog(self, jav_id, dvd_id, release_date, content_exists):
+        """Missing R18.dev data cannot be entered without a UI, so the file is skipped."""
+        self.log_message("  - Missing data cannot be entered in headless mode. Skipping file.")
+        return {'dvd_id': None, 'release_date': None, 'cancelled': True}
+
+    def _show_resume_dialog(self, folder, remaining, total):
+        """Resumes an interrupted folder run unless --no-resume was given."""
+        return self.resume
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Torrent Metadata Creator (headless)")
+    parser.add_argument("path", nargs="*", help="video file or folder of videos to process; with --watch, one or more folders")
+    parser.add_argument("--watch", action="store_true", help="keep running and process new videos in the folders once they stop growing (Ctrl+C to stop)")
+    parser.add_argument("--watch-existing", action="store_true", help="with --watch, also process the videos already in the folders")
+    parser.add_argument("--stable-seconds", type=float, default=WATCH_STABLE_SECONDS, metavar="SECONDS",
+                        help=f"with --watch, how long a video must stay unchanged before it is processed (default: {WATCH_STABLE_SECONDS})")
+    parser.add_argument("--announce", help="tracker announce URL (TrackerURL)")
+    parser.add_argument("--screenshots", action=argparse.BooleanOptionalAction, default=None, help="generate screenshots (GenerateScreenshots)")
+    parser.add_argument("--auto-upload", action=argparse.BooleanOptionalAction, default=None, help="upload to ClearJAV after processing (AutoUpload)")
+    parser.add_argument("--api-key", help="ClearJAV API key (ApiKey)")
+    parser.add_argument("--anonymous", action=argparse.BooleanOptionalAction, default=None, help="upload anonymously (AnonymousUpload)")
+    parser.add_argument("--personal-release", action=argparse.BooleanOptionalAction, default=None, help="mark uploads as personal releases (PersonalRelease)")
+    parser.add_argument("--internal", action=argparse.BooleanOptionalAction, default=None, help="mark uploads as internal releases (InternalRelease)")
+    parser.add_argument("--bypass-mod-queue", action=argparse.BooleanOptionalAction, default=None, help="skip the moderation queue (BypassModQueue)")
+    parser.add_argument("--tag", help="custom tag for personal releases (CustomTag)")
+    parser.add_argument("--filename-mode", choices=["content_id", "dvd_id", "torrent_title"], help="how processed files are renamed (FilenameMode)")
+    parser.add_argument("--recursive", action=argparse.BooleanOptionalAction, default=None, help="also process videos in subfolders (ScanSubfolders)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB", help="skip files and folders matching GLOB; repeatable (ScanExclude)")
+    parser.add_argument("--min-size", type=float, metavar="MB", help="skip videos smaller than MB (ScanMinSizeMB)")
+    parser.add_argument("--max-size", type=float, metavar="MB", help="skip videos larger than MB; 0 for no limit (ScanMaxSizeMB)")
+    parser.add_argument("--min-age", type=float, metavar="MINUTES", help="skip videos modified less than MINUTES ago (ScanMinAgeMinutes)")
+    parser.add_argument("--max-age", type=float, metavar="DAYS", help="skip videos last modified more than DAYS ago (ScanMaxAgeDays)")
+    parser.add_argument("--workers", type=int, help="files processed in parallel for folders (BulkWorkers)")
+    parser.add_argument("--cpu-budget", type=int, metavar="CORES", help="cores shared by the external tools and torrent hashing (CpuBudget)")
+    parser.add_argument("--piece-length", choices=PIECE_LENGTH_CHOICES, help="torrent piece size (PieceLength)")
+    parser.add_argument("--on-duplicate", choices=["skip", "proceed"], default="skip", help="what to do when ClearJAV already has the DVD ID (default: skip)")
+    parser.add_argument("--resume", action=argparse.BooleanOptionalAction, default=True,
+                        help="continue an interrupted run of the same folder where it stopped (default: resume)")
+    parser.add_argument("--upload-wait", type=float, default=300, metavar="SECONDS",
+                        help="how long to wait for queued uploads before exiting; 0 leaves them for the next run (default: 300)")
+    parser.add_argument("--profile", action=argparse.BooleanOptionalAction, default=None,
+                        help="write a cProfile pstats file and per-tool CPU/memory usage for the run (Profiling)")
+    parser.add_argument("--rescan-tools", action="store_true", help="search for the external tools and probe their versions again instead of using the cache")
+    parser.add_argument("--refresh-r18", action="store_true",
+                        help="query r18.dev again instead of using cached lookups; fresh results are cached (R18CacheBypass)")
+    parser.add_argument("--clear-r18-cache", action="store_true", help="delete every cached r18.dev lookup before the run")
+    parser.add_argument("--benchmark-piece-length", metavar="SIZE_MIB", type=int, nargs="?", const=1024,
+                        help="hash a synthetic file of SIZE_MIB (default 1024) with each candidate piece length and exit")
+    parser.add_argument("--hash-workers", type=int, default=TORRENT_HASH_WORKERS, help="threads used by the piece length benchmark")
+    return parser
+
+def apply_overrides(processor, args):
+    """Applies the command-line flags that were given on top of settings.ini."""
+    overrides = {
+        'tracker_url': args.announce,
+        'generate_screenshots': args.screenshots,
+        'auto_upload': args.auto_upload,
+        'api_key': args.api_key,
+        'anonymous_upload': args.anonymous,
+        'personal_release': args.personal_release,
+        'internal_release': args.internal,
+        'bypass_mod_queue': args.bypass_mod_queue,
+        'custom_tag': args.tag,
+        'filename_mode': args.filename_mode,
+        'bulk_workers': None if args.workers is None else str(args.workers),
+        'piece_length': args.piece_length,
+        'profiling': args.profile,
+        'scan_subfolders': args.recursive,
+        'r18_cache_bypass': True if args.refresh_r18 else None,
+    }
+    for name, value in overrides.items():
+        if value is not None:
+            getattr(processor, name).set(value)
+
+    if args.cpu_budget is not None:
+        processor.cpu_budget = CpuBudget(args.cpu_budget)
+
+    scanner = processor.folder_scanner
+    if args.exclude:
+        scanner.exclude = tuple(args.exclude)
+    if args.min_size is not None:
+        scanner.min_size = args.min_size * MIB
+    if args.max_size is not None:
+        scanner.max_size = args.max_size * MIB
+    if args.min_age is not None:
+        scanner.min_age = args.min_age * 60
+    if args.max_age is not None:
+        scanner.max_age = args.max_age * 86400
+
+def run_watch(processor, args):
+    """Runs watch mode until Ctrl+C or SIGTERM, letting files in progress finish."""
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        if not stop_event.is_set():
+            processor.log_message("Stopping; waiting for the videos in progress to finish...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, stop)
+    return processor.run_watch(args.path, stop_event, include_existing=args.watch_existing,
+                               stable_seconds=args.stable_seconds)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.benchmark_piece_length:
+        print_piece_length_benchmark(args.benchmark_piece_length * MIB, workers=args.hash_workers)
+        return EXIT_OK
+
+    if not args.path:
+        parser.print_usage(sys.stderr)
+        print("error: a file or folder to process is required", file=sys.stderr)
+        return EXIT_USAGE
+    if len(args.path) > 1 and not args.watch:
+        print("error: only one file or folder can be processed at a time; use --watch to watch several folders", file=sys.stderr)
+        return EXIT_USAGE
+    for path in args.path:
+        if not os.path.exists(path):
+            print(f"error: path not found: {path}", file=sys.stderr)
+            return EXIT_USAGE
+        if args.watch and not os.path.isdir(path):
+            print(f"error: --watch needs folders, not files: {path}", file=sys.stderr)
+            return EXIT_USAGE
+
+    processor = HeadlessProcessor(on_duplicate=args.on_duplicate, resume=args.resume)
+    processor.load_config()
+    apply_overrides(processor, args)
+    processor.input_path.set(os.path.abspath(args.path[0]))
+
+    if not processor.tracker_url.get():
+        print("error: an announce URL is required (--announce or TrackerURL in settings.ini)", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.rescan_tools:
+        processor.tool_cache.invalidate()
+    if args.clear_r18_cache:
+        processor.clear_r18_cache()
+    missing_tools = processor.resolve_tools()
+    if missing_tools:
+        print(f"error: required tools not found: {', '.join(missing_tools)}", file=sys.stderr)
+        return EXIT_MISSING_TOOLS
+
+    if processor.auto_upload.get():
+        api_key = processor.api_key.get().strip()
+        if not api_key:
+            print("error: an API key is required for auto upload (--api-key or ApiKey in settings.ini)", file=sys.stderr)
+            return EXIT_USAGE
+        is_valid, _ = processor.validate_api_key(api_key)
+        if not is_valid:
+            print("error: the API key was rejected by ClearJAV", file=sys.stderr)
+            return EXIT_AUTH
+
+    if args.watch:
+        success = run_watch(processor, args)
+    elif os.path.isdir(args.path[0]):
+        success = processor.run_bulk_generation()
+    else:
+        success = processor.run_single_generation()
+
+    if processor.upload_outbox.pending_count() and args.upload_wait > 0:
+        processor.log_message(f"Waiting up to {int(args.upload_wait)}s for queued uploads...")
+        processor.upload_outbox.wait_until_drained(timeout=args.upload_wait)
+
+    if not success or processor.upload_outbox.failed_count:
+        return EXIT_FAILED
+    if processor.upload_outbox.pending_count():
+        return EXIT_UPLOADS_PENDING
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3219 @@
+"""Processing pipeline of the Torrent Metadata Creator, shared by the GUI and the command line.
+
+This module must stay importable without customtkinter/tkinterdnd2 so headless
+runs start fast and scripts can import it.
+"""
+import subprocess
+import threading
+import queue
+import os
+import shutil
+import traceback
+import configparser
+import sys
+import tempfile
+import sqlite3
+import importlib
+import functools
+import itertools
+import collections
+import json
+import re
+import hashlib
+import math
+import time
+import random
+import uuid
+import contextlib
+import fnmatch
+import logging.handlers
+import cProfile
+import pstats
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Configuration constants
+CONFIG_FILE = "settings.ini"
+CACHE_DIR = "cache"
+PROBE_CACHE_FILE = os.path.join(CACHE_DIR, "probe_cache.sqlite")
+R18_CACHE_FILE = os.path.join(CACHE_DIR, "r18_cache.sqlite")
+R18_CACHE_POSITIVE_TTL_DAYS = 30  # Found IDs rarely change on R18.dev
+R18_CACHE_NEGATIVE_TTL_HOURS = 12  # Missing IDs may be added later, so recheck sooner
+DUPLICATE_INDEX_FILE = os.path.join(CACHE_DIR, "duplicate_index.sqlite")
+DUPLICATE_INDEX_TTL_MINUTES = 60  # How long a ClearJAV duplicate lookup is reused; 0 disables the index
+OUTBOX_DIR = os.path.join(CACHE_DIR, "outbox")
+JOB_JOURNAL_FILE = os.path.join(CACHE_DIR, "job_journal.sqlite")
+LOG_FILE = os.path.join("logs", "torrent-metadata-creator.log")
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024  # Rotated to .log.1, .log.2, ... once it grows past this
+LOG_FILE_BACKUPS = 5
+RUN_LOG_DIR = os.path.join("logs", "runs")  # One JSON-lines file of stage timings per run
+PROFILE_DIR = os.path.join("logs", "profiles")  # pstats and folded tool stacks of profiled runs
+UPLOAD_MAX_ATTEMPTS = 6
+UPLOAD_RETRY_BASE = 30  # Seconds before the first upload retry, doubled for every further attempt
+UPLOAD_RETRY_MAX = 30 * 60
+R18_PREFETCH_CONCURRENCY = 4  # Content IDs resolved in parallel before/while a folder is processed
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.wmv')
+SCAN_LOOKAHEAD = 32  # Files found by the folder scan and queued ahead of the workers
+WATCH_POLL_SECONDS = 5  # How often watched folders are scanned
+WATCH_STABLE_SECONDS = 30  # A new video must keep its size and mtime this long before it is processed
+WATCH_QUEUE_SIZE = 100  # Stable videos waiting for a worker; more stay pending until there is room
+INTERMODAL_EXE = "imdl" if os.name == 'nt' else "intermodal"
+REQUIRED_TOOLS = {
+    "ffmpeg": "https://ffmpeg.org/download.html",
+    "ffprobe": "https://ffmpeg.org/download.html",
+    "mtn": "https://www.videohelp.com/software/movie-thumbnailer",
+    "mediainfo": "https://mediaarea.net/en/MediaInfo/Download",
+    INTERMODAL_EXE: "https://github.com/casey/intermodal/releases/"
+}
+TOOL_CACHE_FILE = os.path.join(CACHE_DIR, "tool_cache.sqlite")
+# Arguments that make each tool print its version, and the pattern that extracts it
+TOOL_VERSION_PROBES = {
+    "ffmpeg": (["-version"], r"version\s+n?(\d+(?:\.\d+)+)"),
+    "ffprobe": (["-version"], r"version\s+n?(\d+(?:\.\d+)+)"),
+    "mtn": (["-h"], r"(\d+(?:\.\d+)+)"),
+    "mediainfo": (["--Version"], r"v(\d+(?:\.\d+)+)"),
+    INTERMODAL_EXE: (["--version"], r"(\d+(?:\.\d+)+)"),
+}
+MEDIAINFO_JSON_MIN_VERSION = (18, 3)  # First MediaInfo release with --Output=JSON
+CPU_BUDGET = os.cpu_count() or 1  # Cores shared by every external tool and the built-in hasher
+# Cores a call of each tool asks for: (wanted, minimum). ffmpeg gets "-threads" set to what it was
+# granted (multi-input commands ask for one core per input instead, see limit_tool_threads);
+# mtn, mediainfo and intermodal have no thread option and work on one core.
+TOOL_CPU_COSTS = {
+    "ffmpeg": (2, 1),
+    "ffprobe": (1, 1),
+    "mediainfo": (1, 1),
+    "mtn": (1, 1),
+    INTERMODAL_EXE: (1, 1),
+}
+TORRENT_HASH_CPU_SHARE = 0.5  # Most of the budget the built-in hasher may hold; hashing is bound by disk reads
+MANIFEST_FILE = ".torrent-metadata-manifest.json"  # Per-folder record of what each artifact was built from
+FINGERPRINT_SAMPLES = 8  # Blocks hashed per video, spread evenly from the first to the last byte
+FINGERPRINT_SAMPLE_SIZE = 64 * 1024
+SCREENSHOT_COUNT = 15
+SCREENSHOT_QUALITY = 2
+SCREENSHOT_SINGLE_PASS = True  # Grab all screenshots with one ffmpeg process instead of one per frame
+DEFAULT_BULK_WORKERS = min(4, os.cpu_count() or 1)
+# Options copied into RunSettings when a run starts
+RUN_SETTINGS = ("input_path", "tracker_url", "api_key", "generate_screenshots", "auto_upload", "anonymous_upload",
+                "personal_release", "internal_release", "bypass_mod_queue", "custom_tag", "filename_mode",
+                "bulk_workers", "piece_length", "r18_cache_bypass", "scan_subfolders", "profiling")
+LONG_VIDEO_SECONDS = 4 * 3600
+MTN_ARGS = ["-P"]
+MTN_LONG_VIDEO_ARGS = ["-s", "300", "-w", "1024", "-c", "3", "-P"]  # Fewer, smaller tiles for videos over LONG_VIDEO_SECONDS
+
+# Torrent creation
+TORRENT_ENGINE = "builtin"  # "builtin" hashes in-process, "intermodal" always shells out
+TORRENT_HASH_WORKERS = os.cpu_count() or 1
+TORRENT_READ_BUFFER = 64 * 1024 * 1024
+TORRENT_MAX_BYTES_IN_FLIGHT = 256 * 1024 * 1024  # Read buffers held at once while hashing, whatever the worker count
+TORRENT_CREATED_BY = "Torrent Metadata Creator"  # "created by" of torrents hashed in-process; intermodal stamps its own
+
+# Piece length picked from the content size: (largest content size, piece length).
+# Keeps piece lists around 1000-4000 entries without making small clips too coarse.
+KIB = 1024
+MIB = 1024 * KIB
+GIB = 1024 * MIB
+PIECE_LENGTH_POLICY = [
+    (512 * MIB, 256 * KIB),
+    (1 * GIB, 512 * KIB),
+    (2 * GIB, 1 * MIB),
+    (4 * GIB, 2 * MIB),
+    (8 * GIB, 4 * MIB),
+    (16 * GIB, 8 * MIB),
+    (None, 16 * MIB)
+]
+PIECE_LENGTH_CHOICES = ["Auto", "256 KiB", "512 KiB", "1 MiB", "2 MiB", "4 MiB", "8 MiB", "16 MiB", "32 MiB"]
+
+# API endpoints
+CLEARJAV_API_BASE = "https://clearjav.com/api"
+R18_API_BASE = "https://r18.dev/videos/vod/movies/detail/-"
+
+# HTTP client settings
+HTTP_TIMEOUT = 10  # Seconds, for lookups
+HTTP_UPLOAD_TIMEOUT = 30  # Seconds, for torrent uploads
+HTTP_MAX_RETRIES = 3  # Extra attempts for idempotent requests
+HTTP_BACKOFF_BASE = 0.5  # Seconds before the first retry, doubled for every further attempt
+HTTP_BACKOFF_MAX = 8
+HTTP_POOL_SIZE = 16  # Keep-alive connections per host
+HTTP_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# ClearJAV resolution ID mappings
+RESOLUTION_MAPPINGS = {
+    "8K VR": 14,
+    "VR": 13,
+    "2160p": 2,
+    "1080p": 3,
+    "720p": 5,
+    "576p": 6,
+    "480p": 8,
+    "404p": 11,
+    "lower": 15
+}
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Keeps slow imports such as requests off the startup path; `except
+    requests.RequestException` only touches the module when an exception is raised.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+requests = LazyModule("requests")
+
+@functools.lru_cache(maxsize=None)
+def load_multipart_encoder():
+    """Returns requests-toolbelt's MultipartEncoder, or None when it is not installed."""
+    try:
+        from requests_toolbelt.multipart.encoder import MultipartEncoder  # Optional: streams upload bodies from disk
+    except ImportError:
+        return None
+    return MultipartEncoder
+
+class StartupTimer:
+    """Collects named checkpoints and import times for the startup timing report."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []
+        self.imports = []
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter()))
+
+    def import_module(self, name):
+        """Imports a module and records how long it took, like `python -X importtime` for one entry."""
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        self.imports.append((name, time.perf_counter() - started))
+        return module
+
+    def report(self):
+        """Returns the report as text: slowest imports first, then checkpoints since start."""
+        lines = ["Startup timing report", f"{'Import':<28}{'ms':>10}"]
+        for name, seconds in sorted(self.imports, key=lambda item: item[1], reverse=True):
+            lines.append(f"{name:<28}{seconds * 1000:>10.1f}")
+        lines.append(f"{'Checkpoint':<28}{'ms':>10}{'delta':>10}")
+        previous = self.start
+        for name, timestamp in self.marks:
+            lines.append(f"{name:<28}{(timestamp - self.start) * 1000:>10.1f}{(timestamp - previous) * 1000:>10.1f}")
+            previous = timestamp
+        return "\n".join(lines)
+
+startup_timer = StartupTimer()
+
+def resource_path(relative_path):
+    """Get absolute path to resource, works for development and PyInstaller."""
+    try:
+        base_path = getattr(sys, '_MEIPASS', None)
+        if base_path is None:
+            base_path = os.path.abspath(".")
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+def bencode(value):
+    """Encodes ints, strings, bytes, lists and dicts into bencoded bytes."""
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return b"i%de" % value
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    if isinstance(value, (bytes, bytearray)):
+        return b"%d:%s" % (len(value), bytes(value))
+    if isinstance(value, (list, tuple)):
+        return b"l" + b"".join(bencode(item) for item in value) + b"e"
+    if isinstance(value, dict):
+        items = sorted((key.encode('utf-8') if isinstance(key, str) else key, item) for key, item in value.items())
+        return b"d" + b"".join(bencode(key) + bencode(item) for key, item in items) + b"e"
+    raise TypeError(f"Cannot bencode value of type {type(value).__name__}")
+
+def bdecode(data):
+    """Decodes bencoded bytes; strings stay bytes. Raises ValueError on malformed input."""
+    def decode(index):
+        if index >= len(data):
+            raise ValueError("Truncated bencoded data")
+        token = data[index:index + 1]
+        if token == b"i":
+            end = data.index(b"e", index)
+            return int(data[index + 1:end]), end + 1
+        if token == b"l":
+            items, index = [], index + 1
+            while data[index:index + 1] != b"e":
+                item, index = decode(index)
+                items.append(item)
+            return items, index + 1
+        if token == b"d":
+            items, index = {}, index + 1
+            while data[index:index + 1] != b"e":
+                key, index = decode(index)
+                items[key], index = decode(index)
+            return items, index + 1
+        if token.isdigit():
+            colon = data.index(b":", index)
+            start = colon + 1
+            end = start + int(data[index:colon])
+            if end > len(data):
+                raise ValueError("Truncated bencoded string")
+            return data[start:end], end
+        raise ValueError(f"Invalid bencoded token at offset {index}")
+
+    value, end = decode(0)
+    if end != len(data):
+        raise ValueError("Trailing data after bencoded value")
+    return value
+
+def intermodal_piece_length(content_size):
+    """Returns the piece length intermodal picks by default for a given content size."""
+    exponent = math.ceil(math.log2(max(content_size, 1)))
+    return min(max(1 << (exponent // 2 + 4), 16 * 1024), 16 * 1024 * 1024)
+
+def select_piece_length(content_size, override=None):
+    """Returns the piece length for a file, honouring a user override such as '4 MiB'."""
+    if override and override.strip().lower() != "auto":
+        return parse_piece_length(override)
+    for max_size, piece_length in PIECE_LENGTH_POLICY:
+        if max_size is None or content_size <= max_size:
+            return piece_length
+
+def parse_piece_length(text):
+    """Parses '4 MiB', '512KiB', '4M' or a plain byte count into a valid piece length."""
+    match = re.match(r'^\s*(\d+)\s*([kmg]?)(?:i?b)?\s*$', text.strip(), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid piece length: '{text}'")
+    value = int(match.group(1)) * {'': 1, 'k': KIB, 'm': MIB, 'g': GIB}[match.group(2).lower()]
+    if value < 16 * KIB or value & (value - 1):
+        raise ValueError(f"Piece length must be a power of two of at least 16 KiB: '{text}'")
+    return value
+
+def format_size(num_bytes):
+    """Formats a byte count with binary units, e.g. 4 MiB."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if num_bytes < 1024 or unit == "GiB":
+            return f"{num_bytes:.1f}".rstrip('0').rstrip('.') + f" {unit}"
+        num_bytes /= 1024
+
+def hash_pieces(file_path, piece_length, workers=TORRENT_HASH_WORKERS, read_buffer=TORRENT_READ_BUFFER,
+                max_in_flight=TORRENT_MAX_BYTES_IN_FLIGHT, progress_callback=None):
+    """Returns the concatenated SHA-1 digests of every piece of a file.
+
+    The file is read sequentially in large buffers (a whole number of pieces each) and
+    the pieces of each buffer are hashed on a thread pool; hashlib releases the GIL
+    while hashing, so this scales with cores up to the disk's read bandwidth. Buffers
+    shrink as workers grow so that at most max_in_flight bytes (or one buffer, for
+    pieces larger than that) are held at once.
+    """
+    chunk_size = max(1, min(read_buffer, max_in_flight // max(1, workers)) // piece_length) * piece_length
+    max_chunks = max(1, max_in_flight // chunk_size)
+    total_size = os.path.getsize(file_path)
+
+    def hash_chunk(chunk):
+        view = memoryview(chunk)
+        return b"".join(hashlib.sha1(view[offset:offset + piece_length]).digest() for offset in range(0, len(view), piece_length))
+
+    digests = []
+    in_flight = []
+    bytes_read = 0
+    with open(file_path, 'rb') as f, ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            in_flight.append(executor.submit(hash_chunk, chunk))
+            # Bound memory use to max_in_flight bytes of buffers
+            while len(in_flight) >= max_chunks:
+                digests.append(in_flight.pop(0).result())
+            if progress_callback:
+                progress_callback(bytes_read, total_size)
+        for future in in_flight:
+            digests.append(future.result())
+    return b"".join(digests)
+
+def create_torrent_file(file_path, output_path, announce, piece_length=None, private=True, creation_date=None,
+                        created_by=TORRENT_CREATED_BY, workers=TORRENT_HASH_WORKERS, progress_callback=None):
+    """Writes a single-file .torrent laid out exactly like `intermodal torrent create` output.
+
+    Without an explicit piece_length, intermodal's own default is used so the result
+    matches a plain intermodal run.
+    """
+    content_size = os.path.getsize(file_path)
+    if piece_length is None:
+        piece_length = intermodal_piece_length(content_size)
+
+    info = {
+        'length': content_size,
+        'name': os.path.basename(file_path),
+        'piece length': piece_length,
+        'pieces': hash_pieces(file_path, piece_length, workers=workers, progress_callback=progress_callback),
+    }
+    if private:
+        info['private'] = 1
+
+    metainfo = {
+        'announce': announce,
+        'created by': created_by,
+        'creation date': int(time.time()) if creation_date is None else creation_date,
+        'encoding': 'UTF-8',
+        'info': info,
+    }
+
+    # Write next to the target and rename so a crash never leaves a truncated .torrent
+    temp_path = output_path + ".part"
+    with open(temp_path, 'wb') as f:
+        f.write(bencode(metainfo))
+    os.replace(temp_path, output_path)
+
+def run_piece_length_benchmark(size_bytes, piece_lengths=None, workers=TORRENT_HASH_WORKERS, directory=None):
+    """Hashes a synthetic file with each candidate piece length and returns the measurements."""
+    if piece_lengths is None:
+        piece_lengths = sorted({piece_length for _, piece_length in PIECE_LENGTH_POLICY})
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as temp_dir:
+        sample_path = os.path.join(temp_dir, "benchmark.bin")
+        block = os.urandom(8 * MIB)
+        with open(sample_path, 'wb') as f:
+            remaining = size_bytes
+            while remaining > 0:
+                f.write(block[:min(remaining, len(block))])
+                remaining -= len(block)
+
+        torrent_path = os.path.join(temp_dir, "benchmark.torrent")
+        for piece_length in piece_lengths:
+            start = time.perf_counter()
+            create_torrent_file(sample_path, torrent_path, "https://example.invalid/announce", piece_length=piece_length, workers=workers)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'piece_length': piece_length,
+                'pieces': math.ceil(size_bytes / piece_length),
+                'seconds': elapsed,
+                'mib_per_second': size_bytes / MIB / elapsed if elapsed else float('inf'),
+                'torrent_size': os.path.getsize(torrent_path)
+            })
+    return results
+
+def print_piece_length_benchmark(size_bytes, workers=TORRENT_HASH_WORKERS):
+    """Runs the piece length benchmark and prints a table of the results."""
+    print(f"Hashing a {format_size(size_bytes)} synthetic file with {workers} worker(s)...")
+    print(f"{'Piece length':>12}  {'Pieces':>8}  {'MiB/s':>9}  {'.torrent size':>13}")
+    for result in run_piece_length_benchmark(size_bytes, workers=workers):
+        print(f"{format_size(result['piece_length']):>12}  {result['pieces']:>8}  {result['mib_per_second']:>9.1f}  {format_size(result['torrent_size']):>13}")
+    print(f"Policy choice for this size: {format_size(select_piece_length(size_bytes))}")
+
+def open_cache_db(db_path):
+    """Opens a SQLite cache database shared between threads, creating its folder if needed."""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return sqlite3.connect(db_path, check_same_thread=False)
+
+# Labels of mediainfo's text output mapped to the field names the track model reads;
+# other labels are kept under their own name
+MEDIAINFO_TEXT_FIELDS = {
+    "Format": "Format",
+    "Format version": "Format_Version",
+    "Commercial name": "Format_Commercial_IfAny",
+    "Codec ID": "CodecID",
+    "Width": "Width",
+    "Height": "Height",
+    "Title": "Title",
+    "Movie name": "Movie",
+}
+
+def resolution_label(height):
+    """Maps a video height in pixels to the resolution label used in torrent titles."""
+    if height >= 2160:
+        return "2160p"
+    elif height >= 1080:
+        return "1080p"
+    elif height >= 720:
+        return "720p"
+    elif height >= 576:
+        return "576p"
+    elif height >= 480:
+        return "480p"
+    elif height >= 404:
+        return "404p"
+    else:
+        return "lower"
+
+class MediaTrack:
+    """One MediaInfo track (General, Video, Audio, Text, Menu...) with its raw fields."""
+
+    def __init__(self, kind, fields):
+        self.kind = kind
+        self.fields = fields
+
+    def get(self, field, default=None):
+        value = self.fields.get(field)
+        return default if value in (None, "") else value
+
+    def _get_int(self, field):
+        value = self.get(field)
+        if value is None:
+            return None
+        digits = re.sub(r'[^0-9]', '', str(value).split('.')[0])
+        return int(digits) if digits else None
+
+    @property
+    def width(self):
+        return self._get_int("Width")
+
+    @property
+    def height(self):
+        return self._get_int("Height")
+
+    @property
+    def format(self):
+        return self.get("Format", "")
+
+    @property
+    def codec_id(self):
+        return self.get("CodecID", "")
+
+    @property
+    def title(self):
+        return self.get("Title") or self.get("Movie")
+
+class MediaInfoReport:
+    """Structured MediaInfo result built from one mediainfo invocation.
+
+    mediainfo's text output is parsed section by section into a track model, and the
+    text itself is kept, which is what render_text writes out.
+    """
+
+    def __init__(self, tracks, text=None):
+        self.tracks = tracks
+        self.text = text
+
+    @classmethod
+    def from_text(cls, text):
+        """Builds a report from mediainfo's default text output, one track per section."""
+        tracks = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if " : " not in line:
+                # Section headers look like "General", "Video" or "Audio #2"
+                tracks.append(MediaTrack(line.strip().split(" #")[0], {}))
+            elif tracks:
+                label, _, value = line.partition(":")
+                label = label.strip()
+                tracks[-1].fields.setdefault(MEDIAINFO_TEXT_FIELDS.get(label, label), value.strip())
+        return cls(tracks, text=text)
+
+    def to_dict(self):
+        """Returns a JSON-serializable form for the probe cache."""
+        return {'tracks': [[track.kind, track.fields] for track in self.tracks], 'text': self.text}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([MediaTrack(kind, fields) for kind, fields in data['tracks']], text=data.get('text'))
+
+    def tracks_of(self, kind):
+        return [track for track in self.tracks if track.kind == kind]
+
+    @property
+    def general(self):
+        tracks = self.tracks_of("General")
+        return tracks[0] if tracks else MediaTrack("General", {})
+
+    @property
+    def video(self):
+        tracks = self.tracks_of("Video")
+        return tracks[0] if tracks else None
+
+    @property
+    def audio(self):
+        tracks = self.tracks_of("Audio")
+        return tracks[0] if tracks else None
+
+    @property
+    def title(self):
+        return self.general.title
+
+    @property
+    def resolution(self):
+        """Resolution label of the first video track, defaulting to 1080p."""
+        if self.video is None or not self.video.height:
+            return "1080p"
+        return resolution_label(self.video.height)
+
+    @property
+    def video_codec(self):
+        """Simplified video codec name of the first video track, defaulting to H.264."""
+        if self.video is None:
+            return "H.264"
+        format_name = self.video.format
+        if 'AVC' in format_name or 'H.264' in format_name:
+            return "H.264"
+        elif 'HEVC' in format_name or 'H.265' in format_name:
+            return "H.265"
+        elif 'VP9' in format_name:
+            return "VP9"
+        elif 'MPEG-2' in format_name or (format_name == 'MPEG Video' and str(self.video.get('Format_Version', '')).endswith('2')):
+            return "MPEG-2"
+        elif 'VC-1' in format_name:
+            return "VC-1"
+
+        codec = self.video.codec_id.upper()
+        if 'AVC' in codec or 'H264' in codec:
+            return "H.264"
+        elif 'HEVC' in codec or 'H265' in codec:
+            return "H.265"
+        elif 'VP9' in codec:
+            return "VP9"
+        elif 'MPEG-2' in codec or 'MPEG2' in codec:
+            return "MPEG-2"
+        elif 'VC-1' in codec:
+            return "VC-1"
+        return "H.264"
+
+    @property
+    def audio_codec(self):
+        """Simplified audio codec name of the first audio track, defaulting to AAC."""
+        if self.audio is None or not self.audio.format:
+            return "AAC"
+        format_name = self.audio.format
+        description = " ".join(str(self.audio.get(field, "")) for field in ("Format", "Format_Commercial_IfAny"))
+
+        # E-AC-3 must be checked before AC-3, which it contains
+        if 'AAC' in format_name:
+            return "AAC"
+        elif 'E-AC-3' in format_name or 'EAC3' in format_name:
+            return "DD+"
+        elif 'AC-3' in format_name or 'AC3' in format_name:
+            return "DD"
+        elif 'TrueHD' in description or 'MLP FBA' in format_name:
+            return "TrueHD"
+        elif 'DTS:X' in description:
+            return "DTS:X"
+        elif 'DTS-HD MA' in description or 'Master Audio' in description or 'XLL' in description:
+            return "DTS-HD MA"
+        elif 'DTS-HD HRA' in description or 'High Resolution' in description:
+            return "DTS-HD HRA"
+        elif 'DTS-ES' in description:
+            return "DTS-ES"
+        elif 'DTS' in format_name:
+            return "DTS"
+        elif 'FLAC' in format_name:
+            return "FLAC"
+        elif 'ALAC' in format_name:
+            return "ALAC"
+        elif 'PCM' in format_name:
+            return "LPCM"
+        elif 'Opus' in format_name:
+            return "Opus"
+        return format_name
+
+    def render_text(self, complete_name=None):
+        """Returns mediainfo's own text report with the Complete name line replaced, as written to the .txt file."""
+        if self.text is None:
+            raise ValueError("MediaInfo report was not parsed from text output")
+        lines = self.text.strip().splitlines()
+        if complete_name:
+            lines = [f"{'Complete name':<41}: {complete_name}" if line.startswith("Complete name") else line for line in lines]
+        return "\n".join(lines)
+
+class ProbeCache:
+    """Caches probe results (MediaInfo output, duration) per video file, in memory and on disk.
+
+    Entries are keyed by absolute path and only reused while the file's size and
+    modification time are unchanged, so every stage of a run - and every later run
+    over the same folder - shares a single probe per file.
+    """
+
+    def __init__(self, db_path=PROBE_CACHE_FILE):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.Lock()
+        self._file_locks = {}
+        self._entries = {}
+
+    def _connect(self):
+        if self._db is None:
+            self._db = open_cache_db(self.db_path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS probes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, data TEXT)")
+        return self._db
+
+    def _load(self, path, size, mtime_ns):
+        entry = self._entries.get(path)
+        if entry and entry[0] == (size, mtime_ns):
+            return entry[1]
+        try:
+            row = self._connect().execute("SELECT size, mtime_ns, data FROM probes WHERE path = ?", (path,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        data = json.loads(row[2]) if row and (row[0], row[1]) == (size, mtime_ns) else {}
+        self._entries[path] = ((size, mtime_ns), data)
+        return data
+
+    def _store(self, path, size, mtime_ns, data):
+        try:
+            self._connect().execute("INSERT OR REPLACE INTO probes (path, size, mtime_ns, data) VALUES (?, ?, ?, ?)",
+                                    (path, size, mtime_ns, json.dumps(data)))
+            self._db.commit()
+        except sqlite3.Error:
+            pass  # The cache is an optimization; a read-only or locked database must not fail processing
+
+    def get(self, video_file, field, probe_func):
+        """Returns a cached probe field for video_file, running probe_func once on a miss."""
+        path = os.path.abspath(video_file)
+        with self._lock:
+            file_lock = self._file_locks.setdefault(path, threading.Lock())
+
+        # Stages of the same file asking concurrently wait for one probe instead of racing
+        with file_lock:
+            stat = os.stat(path)
+            with self._lock:
+                data = self._load(path, stat.st_size, stat.st_mtime_ns)
+                if field in data:
+                    return data[field]
+
+            value = probe_func()
+
+            with self._lock:
+                data = dict(self._load(path, stat.st_size, stat.st_mtime_ns))
+                data[field] = value
+                self._entries[path] = ((stat.st_size, stat.st_mtime_ns), data)
+                self._store(path, stat.st_size, stat.st_mtime_ns, data)
+            return value
+
+    def rename(self, old_path, new_path):
+        """Moves the cached probe results of a renamed file to its new path."""
+        old_path, new_path = os.path.abspath(old_path), os.path.abspath(new_path)
+        with self._lock:
+            entry = self._entries.pop(old_path, None)
+            try:
+                self._connect().execute("UPDATE OR REPLACE probes SET path = ? WHERE path = ?", (new_path, old_path))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+            if entry:
+                self._entries[new_path] = entry
+
+class FolderScanner:
+    """Streams the video files of a folder, optionally with its subfolders, as os.scandir finds them.
+
+    Directories are walked depth-first with an explicit stack and each directory's
+    entries are sorted, so files come out in a stable order while memory only grows
+    with the depth of the tree and the size of a single directory. Symlinked
+    directories are not followed. Sizes are in bytes and ages in seconds; 0 means no
+    limit. Exclude globs are matched, case-insensitively, against both the name and
+    the path relative to the scanned folder (with '/' separators).
+    """
+
+    def __init__(self, extensions=VIDEO_EXTENSIONS, min_size=0, max_size=0, min_age=0, max_age=0, exclude=()):
+        self.extensions = extensions
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_age = min_age
+        self.max_age = max_age
+        self.exclude = exclude
+
+    def is_excluded(self, relative_path):
+        name = relative_path.rsplit('/', 1)[-1].lower()
+        return any(fnmatch.fnmatchcase(name, pattern.lower()) or fnmatch.fnmatchcase(relative_path.lower(), pattern.lower())
+                   for pattern in self.exclude)
+
+    def accepts(self, stat, now):
+        age = now - stat.st_mtime
+        return (stat.st_size >= self.min_size and (not self.max_size or stat.st_size <= self.max_size)
+                and age >= self.min_age and (not self.max_age or age <= self.max_age))
+
+    def scan(self, folder, recursive=False):
+        """Yields the paths of matching video files below folder as they are found."""
+        stack = [folder]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name.lower())
+            except OSError:
+                continue  # Unreadable folders are skipped, not fatal
+            now = time.time()
+            subdirectories = []
+            for entry in entries:
+                if self.is_excluded(os.path.relpath(entry.path, folder).replace(os.sep, '/')):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            subdirectories.append(entry.path)
+                    elif entry.name.lower().endswith(self.extensions) and entry.is_file() and self.accepts(entry.stat(), now):
+                        yield entry.path
+                except OSError:
+                    continue
+            stack.extend(reversed(subdirectories))
+
+class FolderWatcher:
+    """Polls folders for new or changed videos and queues each one once it stopped growing.
+
+    Polling through FolderScanner works the same on local disks and network shares
+    and needs no extra dependency. A file is queued after its size and mtime stayed
+    unchanged for stable_seconds, so downloads still being written are never picked
+    up. Files present when watching starts are ignored until they change, unless
+    include_existing is set. The queue is bounded: while it is full, stable files stay
+    pending and are offered again on the next poll. All state is keyed by path and
+    dropped once a file disappears; renamed() records a video the pipeline renamed.
+    """
+
+    def __init__(self, folders, scanner, recursive=False, stable_seconds=WATCH_STABLE_SECONDS,
+                 queue_size=WATCH_QUEUE_SIZE, include_existing=False):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.scanner = scanner
+        self.recursive = recursive
+        self.stable_seconds = stable_seconds
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._known = {}  # path -> (size, mtime_ns) when it was queued or found at startup
+        self._pending = {}  # path -> ((size, mtime_ns), time it was first seen with that signature)
+        self._lock = threading.Lock()
+        if not include_existing:
+            for path, signature in self._scan():
+                self._known[path] = signature
+
+    def _scan(self):
+        for folder in self.folders:
+            for path in self.scanner.scan(folder, recursive=self.recursive):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, (stat.st_size, stat.st_mtime_ns)
+
+    def poll(self, now=None):
+        """Scans the folders once and queues the videos that have been stable long enough. Returns how many were queued."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._poll(now)
+
+    def _poll(self, now):
+        queued = 0
+        seen = set()
+        for path, signature in self._scan():
+            seen.add(path)
+            if self._known.get(path) == signature:
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                self._pending[path] = (signature, now)  # New or still growing: restart the debounce
+                continue
+            if now - pending[1] < self.stable_seconds:
+                continue
+            try:
+                self.queue.put_nowait(path)
+            except queue.Full:
+                continue
+            del self._pending[path]
+            self._known[path] = signature
+            queued += 1
+        for path in set(self._pending) - seen:
+            del self._pending[path]
+        for path in set(self._known) - seen:
+            del self._known[path]
+        return queued
+
+    def renamed(self, old_path, new_path):
+        """Records that a queued video was renamed by the pipeline, so its new name is not queued again."""
+        old_path, new_path = os.path.abspath(old_path), os.path.abspath(new_path)
+        try:
+            stat = os.stat(new_path)
+        except OSError:
+            return
+        with self._lock:
+            self._known.pop(old_path, None)
+            self._pending.pop(new_path, None)
+            self._known[new_path] = (stat.st_size, stat.st_mtime_ns)
+
+def output_is_complete(path, video_size):
+    """Returns True when an artifact output written before the manifest existed looks complete.
+
+    A .torrent must decode and describe a file of video_size bytes; JPEGs must end with
+    their end-of-image marker; any other file must not be empty. Folders always pass.
+    """
+    if os.path.isdir(path):
+        return True
+    try:
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".torrent":
+            with open(path, 'rb') as f:
+                info = bdecode(f.read()).get(b'info', {})
+            return info.get(b'length') == video_size
+        if extension in (".jpg", ".jpeg"):
+            with open(path, 'rb') as f:
+                if f.read(2) != b"\xff\xd8":
+                    return False
+                f.seek(-2, os.SEEK_END)
+                return f.read(2) == b"\xff\xd9"
+        return os.path.getsize(path) > 0
+    except (OSError, ValueError, AttributeError):
+        return False
+
+def sample_fingerprint(path, size):
+    """Hashes FINGERPRINT_SAMPLES evenly spaced blocks of a file, or the whole file when it is small."""
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        if size <= FINGERPRINT_SAMPLES * FINGERPRINT_SAMPLE_SIZE:
+            digest.update(f.read())
+        else:
+            step = (size - FINGERPRINT_SAMPLE_SIZE) / (FINGERPRINT_SAMPLES - 1)
+            for index in range(FINGERPRINT_SAMPLES):
+                f.seek(int(index * step))
+                digest.update(f.read(FINGERPRINT_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+class ArtifactManifest:
+    """Records which video fingerprint and options each artifact of a folder was built from.
+
+    Stored as MANIFEST_FILE inside the video folder. An artifact only counts as done
+    when it was recorded after a successful build, its outputs still exist, the
+    options match and the video's fingerprint (size, mtime, sampled-block hash) is
+    unchanged. A video that was only touched keeps its artifacts because the sampled
+    hash still matches; a replaced video or a build interrupted by a crash does not.
+    """
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        self._videos = None
+
+    def _load(self):
+        if self._videos is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._videos = json.load(f).get('videos', {})
+            except (OSError, ValueError, AttributeError):
+                self._videos = {}
+        return self._videos
+
+    def _save(self):
+        temp_path = self.path + ".part"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'videos': self._videos}, f, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass  # Without a writable manifest every run simply rebuilds, as before
+
+    def _fingerprint(self, video_file, known=None):
+        """Returns the video's fingerprint, reading samples only when size or mtime differ from known."""
+        stat = os.stat(video_file)
+        if known and (known.get('size'), known.get('mtime_ns')) == (stat.st_size, stat.st_mtime_ns):
+            return known
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sample_sha1': sample_fingerprint(video_file, stat.st_size)}
+
+    @staticmethod
+    def _same_content(a, b):
+        return (a.get('size'), a.get('sample_sha1')) == (b.get('size'), b.get('sample_sha1'))
+
+    def is_current(self, video_file, artifact, options, outputs):
+        """Returns True when artifact was built from the current video with options and all outputs exist."""
+        with self._lock:
+            entry = self._load().get(os.path.basename(video_file))
+            if not entry or artifact not in entry.get('artifacts', {}):
+                return False
+            known = entry.get('fingerprint', {})
+            fingerprint = self._fingerprint(video_file, known)
+            if not self._same_content(fingerprint, known):
+                return False
+            if fingerprint is not known:
+                entry['fingerprint'] = fingerprint  # Touched or copied, but the same content
+                self._save()
+            if entry['artifacts'][artifact].get('options') != options:
+                return False
+        return all(os.path.exists(path) for path in outputs)
+
+    def has_record(self, video_file, artifact):
+        """Returns True when artifact was ever recorded for a video of this name, current or not."""
+        with self._lock:
+            entry = self._load().get(os.path.basename(video_file))
+            return bool(entry) and artifact in entry.get('artifacts', {})
+
+    def record(self, video_file, artifact, options):
+        """Marks artifact as built from the current video with options."""
+        with self._lock:
+            videos = self._load()
+            name = os.path.basename(video_file)
+            entry = videos.get(name)
+            fingerprint = self._fingerprint(video_file, entry and entry.get('fingerprint'))
+            if not entry or not self._same_content(fingerprint, entry.get('fingerprint', {})):
+                entry = videos[name] = {'artifacts': {}}  # A different video: nothing recorded before applies
+            entry['fingerprint'] = fingerprint
+            # Round-trip through JSON so tuples compare equal to the lists read back later
+            entry['artifacts'][artifact] = {'options': json.loads(json.dumps(options)), 'built_at': time.time()}
+            self._save()
+
+    def rename(self, old_path, new_path):
+        """Moves the entry of a renamed video to its new name."""
+        with self._lock:
+            videos = self._load()
+            entry = videos.pop(os.path.basename(old_path), None)
+            if entry is not None:
+                videos[os.path.basename(new_path)] = entry
+                self._save()
+
+class R18Cache:
+    """Persists R18.dev lookups (content ID -> resolved ID, DVD ID, release date, exists).
+
+    Found and not-found results expire after separate TTLs. Only definitive answers
+    are stored; network errors are never cached as "not found".
+    """
+
+    def __init__(self, db_path=R18_CACHE_FILE, positive_ttl=R18_CACHE_POSITIVE_TTL_DAYS * 86400,
+                 negative_ttl=R18_CACHE_NEGATIVE_TTL_HOURS * 3600):
+        self.db_path = db_path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = open_cache_db(self.db_path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS r18 (content_id TEXT PRIMARY KEY, resolved_id TEXT, dvd_id TEXT, "
+                             "release_date TEXT, exists_on_r18 INTEGER, fetched_at REAL)")
+        return self._db
+
+    def get(self, content_id):
+        """Returns the cached lookup as a dict, or None when missing or expired."""
+        with self._lock:
+            try:
+                row = self._connect().execute("SELECT resolved_id, dvd_id, release_date, exists_on_r18, fetched_at FROM r18 WHERE content_id = ?",
+                                              (content_id.lower(),)).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None:
+            return None
+        resolved_id, dvd_id, release_date, exists, fetched_at = row
+        ttl = self.positive_ttl if exists else self.negative_ttl
+        if time.time() - fetched_at > ttl:
+            return None
+        return {'resolved_id': resolved_id, 'dvd_id': dvd_id, 'release_date': release_date, 'exists': bool(exists)}
+
+    def put(self, content_id, resolved_id, dvd_id, release_date, exists):
+        with self._lock:
+            try:
+                self._connect().execute("INSERT OR REPLACE INTO r18 VALUES (?, ?, ?, ?, ?, ?)",
+                                        (content_id.lower(), resolved_id, dvd_id, release_date, int(exists), time.time()))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def invalidate(self, content_id=None):
+        """Removes one cached content ID, or every entry when content_id is None."""
+        with self._lock:
+            try:
+                if content_id is None:
+                    self._connect().execute("DELETE FROM r18")
+                else:
+                    self._connect().execute("DELETE FROM r18 WHERE content_id = ?", (content_id.lower(),))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+class DuplicateIndex:
+    """Local index of ClearJAV torrents matching a DVD ID, refreshed per ID once its entry expires."""
+
+    def __init__(self, db_path=DUPLICATE_INDEX_FILE, ttl=DUPLICATE_INDEX_TTL_MINUTES * 60):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = open_cache_db(self.db_path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS duplicates (dvd_id TEXT PRIMARY KEY, torrents TEXT, fetched_at REAL)")
+        return self._db
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, dvd_id, empty_fetched_after=None):
+        """Returns the indexed torrents for a DVD ID, or None when unknown or stale.
+
+        An empty result fetched before empty_fetched_after is treated as stale too.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                row = self._connect().execute("SELECT torrents, fetched_at FROM duplicates WHERE dvd_id = ?", (dvd_id.upper(),)).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        torrents = json.loads(row[0])
+        if not torrents and empty_fetched_after is not None and row[1] < empty_fetched_after:
+            return None
+        return torrents
+
+    def put(self, dvd_id, torrents):
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                self._connect().execute("INSERT OR REPLACE INTO duplicates VALUES (?, ?, ?)", (dvd_id.upper(), json.dumps(torrents), time.time()))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def record_queued(self, dvd_id, title):
+        """Adds a queued upload to the DVD ID's entry, so later checks see it before the tracker lists it."""
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                db = self._connect()
+                row = db.execute("SELECT torrents, fetched_at FROM duplicates WHERE dvd_id = ?", (dvd_id.upper(),)).fetchone()
+                fresh = row is not None and time.time() - row[1] <= self.ttl
+                torrents = json.loads(row[0]) if fresh else []
+                torrents.append({'id': f"queued:{title}", 'name': f"{title} (queued for upload)"})
+                db.execute("INSERT OR REPLACE INTO duplicates VALUES (?, ?, ?)",
+                           (dvd_id.upper(), json.dumps(torrents), row[1] if fresh else time.time()))
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+class HttpClient:
+    """Shared HTTP layer with one pooled keep-alive session per host.
+
+    Idempotent requests (GET/HEAD) are retried on connection errors, timeouts and
+    retryable status codes with exponential backoff and full jitter. Other methods
+    are sent once unless retry=True is passed explicitly.
+    """
+
+    def __init__(self, timeout=HTTP_TIMEOUT, max_retries=HTTP_MAX_RETRIES, backoff_base=HTTP_BACKOFF_BASE,
+                 backoff_max=HTTP_BACKOFF_MAX, pool_size=HTTP_POOL_SIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _session(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _backoff_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, retry=None, **kwargs):
+        """Sends a request through the host's pooled session, retrying when allowed."""
+        kwargs.setdefault('timeout', self.timeout)
+        if retry is None:
+            retry = method.upper() in ('GET', 'HEAD')
+        attempts = self.max_retries + 1 if retry else 1
+        session = self._session(url)
+
+        for attempt in range(attempts):
+            response = None
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == attempts - 1:
+                    raise
+            else:
+                if response.status_code not in HTTP_RETRY_STATUS_CODES or attempt == attempts - 1:
+                    return response
+            time.sleep(self._backoff_delay(attempt, response))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+class JobJournal:
+    """Durable record of bulk runs, so an interrupted folder can be resumed where it stopped.
+
+    For every file of a folder's latest run it keeps the file state and the state of
+    each stage ('pending', 'running', 'done' or 'failed'), the current path (files
+    may be renamed while processing) and the decisions already made: R18.dev data,
+    manual input, duplicate confirmations and the queued upload's outbox job ID.
+    Files are added as the folder scan finds them, so each run also records whether
+    its scan finished. Every change is committed immediately.
+    """
+
+    def __init__(self, db_path=JOB_JOURNAL_FILE):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = open_cache_db(self.db_path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS jobs (folder TEXT PRIMARY KEY, started_at REAL, finished_at REAL, scan_done INTEGER DEFAULT 0)")
+            if "scan_done" not in [column[1] for column in self._db.execute("PRAGMA table_info(jobs)")]:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN scan_done INTEGER DEFAULT 0")
+            self._db.execute("CREATE TABLE IF NOT EXISTS job_files (folder TEXT, name TEXT, position INTEGER, path TEXT, state TEXT, "
+                             "stages TEXT, decisions TEXT, PRIMARY KEY (folder, name))")
+        return self._db
+
+    def start(self, folder):
+        """Replaces the folder's journal with a new, empty run."""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            try:
+                db = self._connect()
+                db.execute("DELETE FROM job_files WHERE folder = ?", (folder,))
+                db.execute("INSERT OR REPLACE INTO jobs (folder, started_at, finished_at, scan_done) VALUES (?, ?, NULL, 0)", (folder, time.time()))
+                db.commit()
+            except sqlite3.Error:
+                pass  # Without a journal the run works as before, it just cannot be resumed
+
+    def add_file(self, folder, video_file, position):
+        """Adds a file found by the run's folder scan as pending. Its name is the path relative to folder."""
+        with self._lock:
+            try:
+                self._connect().execute("INSERT OR REPLACE INTO job_files VALUES (?, ?, ?, ?, 'pending', '{}', '{}')",
+                                        (folder, os.path.relpath(video_file, folder), position, os.path.abspath(video_file)))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def finish_scan(self, folder):
+        """Records that every file of the folder was found, so a resume does not need to scan again."""
+        with self._lock:
+            try:
+                self._connect().execute("UPDATE jobs SET scan_done = 1 WHERE folder = ?", (os.path.abspath(folder),))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def finish(self, folder):
+        with self._lock:
+            try:
+                self._connect().execute("UPDATE jobs SET finished_at = ? WHERE folder = ?", (time.time(), os.path.abspath(folder)))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def unfinished(self, folder):
+        """Returns the interrupted run of folder, or None.
+
+        The run is a dict with 'scan_done' and 'files', the files found so far in
+        scan order, each a dict with name, path, state, stages and decisions.
+        """
+        folder = os.path.abspath(folder)
+        with self._lock:
+            try:
+                db = self._connect()
+                job = db.execute("SELECT finished_at, scan_done FROM jobs WHERE folder = ?", (folder,)).fetchone()
+                if job is None or job[0] is not None:
+                    return None
+                rows = db.execute("SELECT name, path, state, stages, decisions FROM job_files WHERE folder = ? ORDER BY position",
+                                  (folder,)).fetchall()
+            except sqlite3.Error:
+                return None
+        files = [{'name': name, 'path': path, 'state': state, 'stages': json.loads(stages), 'decisions': json.loads(decisions)}
+                 for name, path, state, stages, decisions in rows]
+        return {'scan_done': bool(job[1]), 'files': files}
+
+    def _update(self, folder, name, column, update):
+        with self._lock:
+            try:
+                db = self._connect()
+                row = db.execute(f"SELECT {column} FROM job_files WHERE folder = ? AND name = ?", (folder, name)).fetchone()
+                if row is None:
+                    return
+                db.execute(f"UPDATE job_files SET {column} = ? WHERE folder = ? AND name = ?", (update(row[0]), folder, name))
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def set_state(self, folder, name, state):
+        self._update(folder, name, 'state', lambda _: state)
+
+    def set_path(self, folder, name, path):
+        self._update(folder, name, 'path', lambda _: os.path.abspath(path))
+
+    def set_stage(self, folder, name, stage, state):
+        self._update(folder, name, 'stages', lambda stages: json.dumps(dict(json.loads(stages), **{stage: state})))
+
+    def set_decision(self, folder, name, key, value):
+        self._update(folder, name, 'decisions', lambda decisions: json.dumps(dict(json.loads(decisions), **{key: value})))
+
+    def decisions(self, folder, name):
+        with self._lock:
+            try:
+                row = self._connect().execute("SELECT decisions FROM job_files WHERE folder = ? AND name = ?", (folder, name)).fetchone()
+            except sqlite3.Error:
+                row = None
+        return json.loads(row[0]) if row else {}
+
+class UploadOutbox:
+    """Durable on-disk queue of pending uploads, drained by a background thread.
+
+    Every job is a JSON file in the outbox folder, so uploads survive crashes and
+    restarts. Failed sends are retried with exponential backoff; jobs that fail
+    permanently or run out of attempts are moved to the 'failed' subfolder and counted
+    in failed_count. send_func(job) must return (success, permanent_failure, message).
+    """
+
+    def __init__(self, directory, send_func, log_func, max_attempts=UPLOAD_MAX_ATTEMPTS,
+                 retry_base=UPLOAD_RETRY_BASE, retry_max=UPLOAD_RETRY_MAX):
+        self.directory = directory
+        self.failed_directory = os.path.join(directory, "failed")
+        self.send_func = send_func
+        self.log_func = log_func
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._condition = threading.Condition()
+        self._thread = None
+        self._busy = False
+        self.failed_count = 0
+
+    def _job_path(self, job_id, directory=None):
+        return os.path.join(directory or self.directory, f"{job_id}.json")
+
+    def _write_job(self, job, directory=None):
+        os.makedirs(directory or self.directory, exist_ok=True)
+        path = self._job_path(job['id'], directory)
+        with open(path + ".part", 'w', encoding='utf-8') as f:
+            json.dump(job, f)
+        os.replace(path + ".part", path)
+
+    def _load_jobs(self):
+        jobs = []
+        if not os.path.isdir(self.directory):
+            return jobs
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                    jobs.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(jobs, key=lambda job: job['created'])
+
+    def enqueue(self, title, fields, torrent_path, contact_sheet_path=None):
+        """Persists an upload job and wakes the uploader. Returns the job ID."""
+        job = {
+            'id': uuid.uuid4().hex,
+            'created': time.time(),
+            'title': title,
+            'fields': fields,
+            'torrent_path': os.path.abspath(torrent_path),
+            'contact_sheet_path': os.path.abspath(contact_sheet_path) if contact_sheet_path else None,
+            'attempts': 0,
+            'next_attempt': 0,
+            'last_error': None
+        }
+        self._write_job(job)
+        self.start()
+        with self._condition:
+            self._condition.notify_all()
+        return job['id']
+
+    def pending_count(self):
+        return len(self._load_jobs())
+
+    def is_pending(self, job_id):
+        """Returns True while a job is queued and has neither been sent nor failed permanently."""
+        return os.path.exists(self._job_path(job_id))
+
+    def wait_until_drained(self, timeout=None):
+        """Blocks until every queued upload was sent or failed. Returns False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.pending_count() or self._busy:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            with self._condition:
+                self._condition.notify_all()
+            time.sleep(1)
+        return True
+
+    def start(self):
+        """Starts the background uploader if it is not running yet."""
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            jobs = self._load_jobs()
+            now = time.time()
+            due = [job for job in jobs if job['next_attempt'] <= now]
+            if not due:
+                wait_time = min((job['next_attempt'] for job in jobs), default=now + 60) - now
+                with self._condition:
+                    self._condition.wait(timeout=max(1, wait_time))
+                continue
+
+            job = due[0]
+            self._busy = True
+            try:
+                success, permanent, message = self.send_func(job)
+            except Exception as e:
+                success, permanent, message = False, False, str(e)
+            finally:
+                self._busy = False
+
+            if success:
+                self.log_func(f"✓ Torrent uploaded successfully: {job['title']}")
+                with contextlib.suppress(OSError):
+                    os.remove(self._job_path(job['id']))
+                continue
+
+            job['attempts'] += 1
+            job['last_error'] = message
+            if permanent or job['attempts'] >= self.max_attempts:
+                self.log_func(f"✗ Upload failed permanently: {job['title']} ({message}). Kept in {self.failed_directory}")
+                self._write_job(job, self.failed_directory)
+                self.failed_count += 1
+                with contextlib.suppress(OSError):
+                    os.remove(self._job_path(job['id']))
+            else:
+                delay = min(self.retry_max, self.retry_base * (2 ** (job['attempts'] - 1)))
+                job['next_attempt'] = time.time() + delay
+                self.log_func(f"✗ Upload failed: {job['title']} ({message}). Retry {job['attempts']}/{self.max_attempts - 1} in {int(delay)}s")
+                self._write_job(job)
+
+class StageGraph:
+    """Runs named processing stages concurrently while respecting their dependencies."""
+
+    def __init__(self, max_workers=None):
+        self.stages = {}
+        self.max_workers = max_workers
+
+    def add_stage(self, name, func, depends_on=()):
+        """Registers a stage. Dependencies must be added before the stages that need them."""
+        for dependency in depends_on:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self.stages[name] = (func, tuple(depends_on))
+
+    def run(self, on_stage_done=None):
+        """Runs every stage as soon as its dependencies finished and re-raises the first failure.
+
+        Stages depending on a failed stage are never started; stages already running are
+        allowed to finish before the error is raised.
+        """
+        pending = dict(self.stages)
+        finished = set()
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self.stages))) as executor:
+            while pending or running:
+                if error is None:
+                    for name, (func, depends_on) in list(pending.items()):
+                        if all(dependency in finished for dependency in depends_on):
+                            running[executor.submit(func)] = name
+                            del pending[name]
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    exception = future.exception()
+                    if exception is not None:
+                        if error is None:
+                            error = exception
+                    else:
+                        finished.add(name)
+                        if on_stage_done:
+                            on_stage_done(name, len(finished), len(self.stages))
+
+        if error is not None:
+            raise error
+
+# ToolProcess hooks a private Popen method, so it is only used where both exist
+TOOL_RUSAGE_SUPPORTED = hasattr(os, 'wait4') and hasattr(subprocess.Popen, '_try_wait')
+
+class ToolProcess(subprocess.Popen):
+    """Popen that reaps the child with os.wait4, keeping that child's own CPU time and peak RSS.
+
+    resource.getrusage(RUSAGE_CHILDREN) only gives totals over all children, which
+    cannot be split between tools running at the same time. It overrides a private
+    Popen method, so run_tool only uses it for profiled calls where
+    TOOL_RUSAGE_SUPPORTED is true; elsewhere only wall time is recorded.
+    """
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        try:
+            pid, status, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return self.pid, 0
+        if pid == self.pid:
+            self.rusage = rusage
+        return pid, status
+
+def run_tool(command, check=False, timeout=None, on_finish=None, capture_output=False, **popen_kwargs):
+    """subprocess.run() for external tools.
+
+    on_finish(command, wall_seconds, returncode, rusage) is called after every call;
+    rusage is None where os.wait4 is unavailable. Calls without on_finish use a plain
+    subprocess.Popen.
+    """
+    if capture_output:
+        popen_kwargs['stdout'] = subprocess.PIPE
+        popen_kwargs['stderr'] = subprocess.PIPE
+    process_class = ToolProcess if on_finish and TOOL_RUSAGE_SUPPORTED else subprocess.Popen
+    started = time.perf_counter()
+    with process_class(command, **popen_kwargs) as process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except BaseException:
+            process.kill()
+            raise
+        returncode = process.poll()
+    if on_finish:
+        on_finish(command, time.perf_counter() - started, returncode, getattr(process, 'rusage', None))
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, process.args, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(process.args, returncode, stdout, stderr)
+
+class CpuBudget:
+    """Hands out cores from a fixed budget to external tools and the built-in hasher.
+
+    acquire(wanted, minimum) blocks until at least `minimum` cores are free and grants
+    up to `wanted`, so concurrent files and stages share the machine instead of
+    oversubscribing it. Requests larger than the budget are capped to it. Waiters are
+    served in arrival order, so a large request is not starved by a stream of small ones.
+    """
+
+    def __init__(self, cores=CPU_BUDGET):
+        self.cores = max(1, int(cores))
+        self._used = 0
+        self._waiting = collections.deque()
+        self._condition = threading.Condition()
+
+    def acquire(self, wanted, minimum=1):
+        with self._condition:
+            minimum = min(minimum, self.cores)
+            ticket = object()
+            self._waiting.append(ticket)
+            self._condition.wait_for(lambda: self._waiting[0] is ticket and self.cores - self._used >= minimum)
+            self._waiting.popleft()
+            granted = max(minimum, min(wanted, self.cores - self._used))
+            self._used += granted
+            # The next waiter in line may fit into what is left
+            self._condition.notify_all()
+            return granted
+
+    def release(self, cores):
+        with self._condition:
+            self._used -= cores
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, wanted, minimum=1):
+        """Holds cores for the enclosed block and yields how many were granted."""
+        granted = self.acquire(wanted, minimum)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+def tool_cpu_request(tool, command):
+    """Returns the (wanted, minimum) cores a call of tool with command asks the CPU budget for."""
+    inputs = command.count("-i") if tool == "ffmpeg" else 0
+    if inputs > 1:
+        # limit_tool_threads gives every input its own single-threaded decoder. Each decodes
+        # only a few frames, so the call starts once one core is free instead of waiting for
+        # a core per input, which would hold up every later tool call behind it.
+        return inputs, 1
+    return TOOL_CPU_COSTS.get(tool, (1, 1))
+
+def limit_tool_threads(tool, command, threads):
+    """Returns command with the tool's thread-count options set to threads, where it has any.
+
+    -threads applies to the input that follows it, so a multi-input ffmpeg command (the
+    single-pass screenshot grab) would start threads decoders per input. Those inputs
+    only decode a few frames each, so they get one thread apiece instead, which is what
+    tool_cpu_request charged for.
+    """
+    if tool != "ffmpeg":
+        return command
+    per_input = threads if command.count("-i") <= 1 else 1
+    limited = [command[0]]
+    for arg in command[1:]:
+        if arg == "-i":
+            limited += ["-threads", str(per_input)]
+        limited.append(arg)
+    return limited
+
+class RunProfiler:
+    """Collects cProfile data from every thread of a run and merges it into one pstats file.
+
+    cProfile only sees the thread it was enabled on, so each worker and stage function
+    is wrapped with wrap(). If another profiler is already active (Python 3.12+ allows
+    one at a time), the function runs unprofiled.
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._active = threading.local()
+
+    def wrap(self, func):
+        def wrapper(*args, **kwargs):
+            if getattr(self._active, 'profiling', False):
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return func(*args, **kwargs)
+            self._active.profiling = True
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._active.profiling = False
+                with self._lock:
+                    self._profiles.append(profile)
+        return wrapper
+
+    def dump(self, path):
+        """Writes the merged statistics to path and returns them, or None when nothing was profiled."""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stats.dump_stats(path)
+        return stats
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list, e.g. fraction=0.95 for p95."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+class RunLog:
+    """Timing spans of one processing run, appended to a JSON-lines file as they finish.
+
+    Every line is one span: stage, file, wall time, bytes read (when known) and the
+    outcome ('ok', 'skipped' or 'error'). finish() appends a per-stage summary line.
+    """
+
+    def __init__(self, directory=RUN_LOG_DIR):
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        self.path = os.path.join(os.path.abspath(directory), f"{self.run_id}.jsonl")
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        """Appends a non-span record, such as a tool call, to the run log."""
+        self._append(dict(record, run_id=self.run_id))
+
+    def _append(self, record):
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError:
+                pass  # Timing data must never fail processing
+
+    @contextlib.contextmanager
+    def span(self, stage, video_file=None, bytes_read=None):
+        """Times the enclosed block. The yielded dict may be updated, e.g. record['outcome'] = 'skipped'."""
+        record = {'type': 'span', 'run_id': self.run_id, 'stage': stage,
+                  'file': os.path.basename(video_file) if video_file else None,
+                  'start': time.time(), 'bytes_read': bytes_read, 'outcome': 'ok'}
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['outcome'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            record['wall_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            if record['outcome'] == 'skipped':
+                record['bytes_read'] = None
+            with self._lock:
+                self.spans.append(record)
+            self._append(record)
+
+    def summary(self):
+        """Returns {stage: {count, skipped, errors, p50_ms, p95_ms, total_ms, bytes_read}}."""
+        with self._lock:
+            spans = list(self.spans)
+        stages = {}
+        for record in spans:
+            stages.setdefault(record['stage'], []).append(record)
+        summary = {}
+        for stage, records in stages.items():
+            times = [record['wall_ms'] for record in records]
+            summary[stage] = {
+                'count': len(records),
+                'skipped': sum(1 for record in records if record['outcome'] == 'skipped'),
+                'errors': sum(1 for record in records if record['outcome'] == 'error'),
+                'p50_ms': percentile(times, 0.5),
+                'p95_ms': percentile(times, 0.95),
+                'total_ms': round(sum(times), 1),
+                'bytes_read': sum(record['bytes_read'] or 0 for record in records),
+            }
+        return summary
+
+    def finish(self):
+        """Writes the summary line and returns it formatted as a table."""
+        summary = self.summary()
+        wall_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        self._append({'type': 'summary', 'run_id': self.run_id, 'wall_ms': wall_ms, 'stages': summary})
+        lines = [f"{'Stage':<18}{'Count':>7}{'Skip':>6}{'Err':>5}{'p50 ms':>10}{'p95 ms':>10}{'Total ms':>11}{'MB/s':>8}"]
+        for stage, row in sorted(summary.items(), key=lambda item: item[1]['total_ms'], reverse=True):
+            rate = row['bytes_read'] / MIB / (row['total_ms'] / 1000) if row['bytes_read'] and row['total_ms'] else 0
+            lines.append(f"{stage:<18}{row['count']:>7}{row['skipped']:>6}{row['errors']:>5}{row['p50_ms']:>10.1f}"
+                         f"{row['p95_ms']:>10.1f}{row['total_ms']:>11.1f}{(f'{rate:.1f}' if rate else '-'):>8}")
+        lines.append(f"Run wall time: {wall_ms / 1000:.1f}s")
+        return "\n".join(lines)
+
+def find_tool(tool):
+    """Finds a tool next to the application (or PyInstaller bundle) or on the system PATH."""
+    base_path = resource_path(".")
+    if os.name == 'nt':
+        local_path_exe = os.path.join(base_path, f"{tool}.exe")
+        if os.path.exists(local_path_exe):
+            return local_path_exe
+
+    local_path = os.path.join(base_path, tool)
+    if os.path.exists(local_path):
+        return local_path
+
+    # Fall back to system PATH
+    return shutil.which(tool)
+
+def probe_tool_version(tool, path):
+    """Runs a tool's version command and returns its version string, or None when unknown."""
+    args, pattern = TOOL_VERSION_PROBES.get(tool, (["--version"], r"(\d+(?:\.\d+)+)"))
+    try:
+        result = subprocess.run([path] + args, capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=10,
+                                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(pattern, result.stdout + result.stderr)
+    return match.group(1) if match else None
+
+def parse_version(version):
+    """Turns '23.04' into (23, 4) for comparisons; None stays None."""
+    if not version:
+        return None
+    return tuple(int(part) for part in version.split("."))
+
+def tool_capabilities(tool, version):
+    """Returns the optional features a tool version supports. None means the version is unknown."""
+    parsed = parse_version(version)
+    capabilities = {}
+    if tool == "mediainfo":
+        capabilities['json_output'] = None if parsed is None else parsed >= MEDIAINFO_JSON_MIN_VERSION
+    return capabilities
+
+class ToolCache:
+    """Remembers where each external tool was found, its version and capabilities.
+
+    An entry is reused while the binary's size and modification time are unchanged
+    and the search location (application folder and PATH) is the same, so a normal
+    launch costs one stat per tool instead of a search and a version probe.
+    """
+
+    def __init__(self, db_path=TOOL_CACHE_FILE):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = open_cache_db(self.db_path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS tools (tool TEXT PRIMARY KEY, search_key TEXT, path TEXT, "
+                             "size INTEGER, mtime_ns INTEGER, version TEXT)")
+        return self._db
+
+    @staticmethod
+    def _search_key():
+        return resource_path(".") + os.pathsep + os.environ.get("PATH", "")
+
+    def _cached(self, tool, search_key):
+        try:
+            row = self._connect().execute("SELECT search_key, path, size, mtime_ns, version FROM tools WHERE tool = ?", (tool,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[0] != search_key:
+            return None
+        try:
+            stat = os.stat(row[1])
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (row[2], row[3]):
+            return None
+        return {'path': row[1], 'version': row[4]}
+
+    def _store(self, tool, search_key, path, version):
+        try:
+            stat = os.stat(path)
+            self._connect().execute("INSERT OR REPLACE INTO tools VALUES (?, ?, ?, ?, ?, ?)",
+                                    (tool, search_key, path, stat.st_size, stat.st_mtime_ns, version))
+            self._db.commit()
+        except (OSError, sqlite3.Error):
+            pass
+
+    def resolve(self, tools):
+        """Returns {tool: {'path', 'version', 'capabilities'}} for every tool that was found.
+
+        Tools without a valid cache entry are located and version-probed in parallel.
+        """
+        search_key = self._search_key()
+        found = {}
+        with self._lock:
+            stale = []
+            for tool in tools:
+                entry = self._cached(tool, search_key)
+                if entry:
+                    found[tool] = entry
+                else:
+                    stale.append(tool)
+
+            def discover(tool):
+                path = find_tool(tool)
+                return tool, path, probe_tool_version(tool, path) if path else None
+
+            if stale:
+                with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+                    for tool, path, version in executor.map(discover, stale):
+                        if path:
+                            found[tool] = {'path': path, 'version': version}
+                            self._store(tool, search_key, path, version)
+
+        for tool, entry in found.items():
+            entry['capabilities'] = tool_capabilities(tool, entry['version'])
+        return found
+
+    def invalidate(self):
+        """Forgets every tool so the next launch searches and probes again."""
+        with self._lock:
+            try:
+                self._connect().execute("DELETE FROM tools")
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+class LogFile:
+    """Full processing log on disk, rotated by size so it never grows without bound.
+
+    The file is only created on the first write; every line gets a timestamp.
+    """
+
+    def __init__(self, path=LOG_FILE, max_bytes=LOG_FILE_MAX_BYTES, backups=LOG_FILE_BACKUPS):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._logger = None
+        self._lock = threading.Lock()
+
+    def _get_logger(self):
+        if self._logger is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(asctime)s  %(message)s"))
+            logger = logging.getLogger(f"torrent_metadata_creator.{id(self)}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def write(self, message):
+        with self._lock:
+            try:
+                logger = self._get_logger()
+            except OSError:
+                return  # A read-only folder must not break processing
+            for line in message.split("\n"):
+                logger.info(line)
+
+class Setting:
+    """Holds one option value behind the get()/set() interface of tkinter variables."""
+
+    def __init__(self, value=None):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+class RunSettings:
+    """Plain copy of the options, taken by the thread that starts a run.
+
+    Worker, stage and prefetch threads read this instead of the option holders,
+    which are tkinter variables in the GUI and may only be touched on its thread.
+    """
+
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+class VideoProcessor:
+    """Runs the metadata pipeline: R18.dev lookup, duplicate check, generators and upload.
+
+    The GUI and the command line subclass it and override the user-facing hooks
+    (log_message, set_status, set_progress, finalize_processing and the dialogs).
+    """
+
+    def __init__(self):
+        # Initialize variables
+        self.input_path = self.create_setting("")
+        self.tracker_url = self.create_setting("")
+        self.api_key = self.create_setting("")
+        self.generate_screenshots = self.create_setting(False)
+        self.auto_upload = self.create_setting(False)
+        self.anonymous_upload = self.create_setting(False)
+        self.personal_release = self.create_setting(False)
+        self.internal_release = self.create_setting(False)
+        self.bypass_mod_queue = self.create_setting(False)
+        self.custom_tag = self.create_setting("")
+        self.filename_mode = self.create_setting("content_id")
+        self.bulk_workers = self.create_setting(str(DEFAULT_BULK_WORKERS))
+        self.piece_length = self.create_setting("Auto")
+        self.r18_cache_bypass = self.create_setting(False)
+        self.scan_subfolders = self.create_setting(False)
+        self.profiling = self.create_setting(False)
+        self.settings = self.snapshot_settings()
+        self.folder_scanner = FolderScanner()
+        self.tool_paths = {}
+        self.tool_info = {}
+        self.tool_cache = ToolCache()
+        self.cpu_budget = CpuBudget()
+        self.log_file = LogFile()
+        self.run_log = None
+        self.run_started_at = None
+        self.profiler = None
+        self._tool_calls = []
+        self.probe_cache = ProbeCache()
+        self._manifests = {}
+        self._manifests_lock = threading.Lock()
+        self.r18_cache = R18Cache()
+        self.http = HttpClient()
+        self.duplicate_index = DuplicateIndex()
+        self.upload_outbox = UploadOutbox(OUTBOX_DIR, self._send_outbox_job, self.log_message)
+        self.job_journal = JobJournal()
+
+        # Shared state for parallel bulk processing
+        self._log_lock = threading.Lock()
+        self._dialog_lock = threading.RLock()
+        self._dvd_claims = {}  # DVD ID -> file currently being processed for upload with it
+        self._dvd_claims_lock = threading.Lock()
+        self._log_context = threading.local()
+        self._r18_prefetch = {}
+        
+        # API validation state
+        self.user_data = None
+        self.is_internal_user = False
+        self.upload_api_key = None  # The validated key, used by the background uploader
+
+    def create_setting(self, value):
+        """Creates the holder for one option; the GUI returns tkinter variables instead."""
+        return Setting(value)
+
+    def snapshot_settings(self):
+        """Copies every option into a RunSettings; call on the thread that owns the option holders."""
+        return RunSettings(**{name: getattr(self, name).get() for name in RUN_SETTINGS})
+
+    def resolve_tools(self):
+        """Locates every required tool (cached between launches) and returns the names of those that are missing."""
+        self.tool_info = self.tool_cache.resolve(REQUIRED_TOOLS)
+        self.tool_paths.update({tool: info['path'] for tool, info in self.tool_info.items()})
+        return [tool for tool in REQUIRED_TOOLS if tool not in self.tool_info]
+
+    def tool_supports(self, tool, capability):
+        """Returns True/False for a known capability of a resolved tool, None when it cannot be told."""
+        return self.tool_info.get(tool, {}).get('capabilities', {}).get(capability)
+
+    def manifest_for(self, video_file):
+        """Returns the shared ArtifactManifest of the video's folder."""
+        folder = os.path.dirname(os.path.abspath(video_file))
+        with self._manifests_lock:
+            if folder not in self._manifests:
+                self._manifests[folder] = ArtifactManifest(folder)
+            return self._manifests[folder]
+
+    def _artifact_is_current(self, video_file, artifact, options, outputs, label):
+        """Returns True when an artifact can be skipped; otherwise removes its stale output files.
+
+        Complete outputs the manifest has no record of (built before it existed) are
+        recorded as they are rather than rebuilt, so an existing .torrent keeps its
+        info hash. Folders among the outputs (the screenshot folder) only count towards
+        the check and are never removed, since they may hold files this stage did not write.
+        """
+        manifest = self.manifest_for(video_file)
+        if manifest.is_current(video_file, artifact, options, outputs):
+            self.log_message(f"  - {label} is up to date. Skipping.")
+            return True
+        if not manifest.has_record(video_file, artifact) and all(os.path.exists(path) for path in outputs):
+            video_size = os.path.getsize(video_file)
+            if all(output_is_complete(path, video_size) for path in outputs):
+                manifest.record(video_file, artifact, options)
+                self.log_message(f"  - {label} already exists. Skipping.")
+                return True
+        stale = [path for path in outputs if os.path.isfile(path)]
+        if stale:
+            self.log_message(f"  - {label} is outdated or incomplete. Regenerating.")
+            for path in stale:
+                os.remove(path)
+        return False
+
+    # --- User-facing hooks, overridden by the GUI and the command line ---
+
+    def log_message(self, message):
+        """Writes a log line; prefixed with the current file when processing in parallel."""
+        prefix = getattr(self._log_context, 'prefix', '')
+        if prefix:
+            message = "\n".join(prefix + line if line else line for line in message.split("\n"))
+        self.log_file.write(message)
+        with self._log_lock:
+            print(message)
+
+    def set_status(self, text, color="white"):
+        """Shows a one-line status for the current run."""
+
+    def set_progress(self, value):
+        """Reports overall progress as a fraction between 0 and 1."""
+
+    def finalize_processing(self, success_message="Ready."):
+        """Called once a run has finished."""
+
+    def show_error_window(self, title, message):
+        """Reports a processing error."""
+        self.log_message(f"{title}:\n{message}")
+
+    def _show_duplicate_confirmation_dialog(self, dvd_id, duplicates):
+        """Decides whether to upload despite duplicates; without a UI the upload is skipped."""
+        return False
+
+    def _show_manual_input_dialog(self, jav_id, dvd_id, release_date, content_exists):
+        """Asks for a missing DVD ID/release date; without a UI the file is skipped."""
+        return {'dvd_id': None, 'release_date': None, 'cancelled': True}
+
+    def _show_resume_dialog(self, folder, remaining, total):
+        """Asks whether to resume an interrupted bulk run; without a UI it is resumed."""
+        return True
+
+    def load_config(self):
+        """Load settings from the .ini file."""
+        config = configparser.ConfigParser()
+        if os.path.exists(CONFIG_FILE):
+            config.read(CONFIG_FILE)
+            self.tracker_url.set(config.get('Settings', 'TrackerURL', fallback=''))
+            self.api_key.set(config.get('Settings', 'ApiKey', fallback=''))
+            self.generate_screenshots.set(config.getboolean('Settings', 'GenerateScreenshots', fallback=False))
+            self.auto_upload.set(config.getboolean('Settings', 'AutoUpload', fallback=False))
+            self.anonymous_upload.set(config.getboolean('Settings', 'AnonymousUpload', fallback=False))
+            self.personal_release.set(config.getboolean('Settings', 'PersonalRelease', fallback=False))
+            self.internal_release.set(config.getboolean('Settings', 'InternalRelease', fallback=False))
+            self.bypass_mod_queue.set(config.getboolean('Settings', 'BypassModQueue', fallback=False))
+            self.custom_tag.set(config.get('Settings', 'CustomTag', fallback=''))
+            self.filename_mode.set(config.get('Settings', 'FilenameMode', fallback='content_id'))
+            self.bulk_workers.set(config.get('Settings', 'BulkWorkers', fallback=str(DEFAULT_BULK_WORKERS)))
+            self.piece_length.set(config.get('Settings', 'PieceLength', fallback='Auto'))
+            self.r18_cache_bypass.set(config.getboolean('Settings', 'R18CacheBypass', fallback=False))
+            self.profiling.set(config.getboolean('Settings', 'Profiling', fallback=False))
+            self.cpu_budget = CpuBudget(config.getint('Settings', 'CpuBudget', fallback=CPU_BUDGET))
+            self.scan_subfolders.set(config.getboolean('Settings', 'ScanSubfolders', fallback=False))
+            extensions = config.get('Settings', 'ScanExtensions', fallback=",".join(VIDEO_EXTENSIONS))
+            self.folder_scanner.extensions = tuple(ext.strip().lower() for ext in extensions.split(",") if ext.strip()) or VIDEO_EXTENSIONS
+            self.folder_scanner.min_size = config.getfloat('Settings', 'ScanMinSizeMB', fallback=0) * MIB
+            self.folder_scanner.max_size = config.getfloat('Settings', 'ScanMaxSizeMB', fallback=0) * MIB
+            self.folder_scanner.min_age = config.getfloat('Settings', 'ScanMinAgeMinutes', fallback=0) * 60
+            self.folder_scanner.max_age = config.getfloat('Settings', 'ScanMaxAgeDays', fallback=0) * 86400
+            self.folder_scanner.exclude = tuple(p.strip() for p in config.get('Settings', 'ScanExclude', fallback='').split(";") if p.strip())
+            self.r18_cache.positive_ttl = config.getfloat('Settings', 'R18CachePositiveTTLDays', fallback=R18_CACHE_POSITIVE_TTL_DAYS) * 86400
+            self.r18_cache.negative_ttl = config.getfloat('Settings', 'R18CacheNegativeTTLHours', fallback=R18_CACHE_NEGATIVE_TTL_HOURS) * 3600
+            self.duplicate_index.ttl = config.getfloat('Settings', 'DuplicateIndexTTLMinutes', fallback=DUPLICATE_INDEX_TTL_MINUTES) * 60
+            self.http.timeout = config.getfloat('Settings', 'HttpTimeout', fallback=HTTP_TIMEOUT)
+            self.http.max_retries = config.getint('Settings', 'HttpRetries', fallback=HTTP_MAX_RETRIES)
+
+    def save_config(self):
+        """Save current settings to the .ini file."""
+        config = configparser.ConfigParser()
+        config['Settings'] = {
+            'TrackerURL': self.tracker_url.get(),
+            'ApiKey': self.api_key.get(),
+            'GenerateScreenshots': str(self.generate_screenshots.get()),
+            'AutoUpload': str(self.auto_upload.get()),
+            'AnonymousUpload': str(self.anonymous_upload.get()),
+            'PersonalRelease': str(self.personal_release.get()),
+            'InternalRelease': str(self.internal_release.get()),
+            'BypassModQueue': str(self.bypass_mod_queue.get()),
+            'CustomTag': self.custom_tag.get(),
+            'FilenameMode': self.filename_mode.get(),
+            'BulkWorkers': self.bulk_workers.get(),
+            'PieceLength': self.piece_length.get(),
+            'R18CacheBypass': str(self.r18_cache_bypass.get()),
+            'Profiling': str(self.profiling.get()),
+            'CpuBudget': str(self.cpu_budget.cores),
+            'ScanSubfolders': str(self.scan_subfolders.get()),
+            'ScanExtensions': ",".join(self.folder_scanner.extensions),
+            'ScanMinSizeMB': f"{self.folder_scanner.min_size / MIB:g}",
+            'ScanMaxSizeMB': f"{self.folder_scanner.max_size / MIB:g}",
+            'ScanMinAgeMinutes': f"{self.folder_scanner.min_age / 60:g}",
+            'ScanMaxAgeDays': f"{self.folder_scanner.max_age / 86400:g}",
+            'ScanExclude': ";".join(self.folder_scanner.exclude),
+            'R18CachePositiveTTLDays': f"{self.r18_cache.positive_ttl / 86400:g}",
+            'R18CacheNegativeTTLHours': f"{self.r18_cache.negative_ttl / 3600:g}",
+            'DuplicateIndexTTLMinutes': f"{self.duplicate_index.ttl / 60:g}",
+            'HttpTimeout': f"{self.http.timeout:g}",
+            'HttpRetries': str(self.http.max_retries)
+        }
+        with open(CONFIG_FILE, 'w') as configfile:
+            config.write(configfile)
+
+    def clear_r18_cache(self):
+        """Drops every cached R18.dev lookup so the next run queries R18.dev again."""
+        self.r18_cache.invalidate()
+        self.log_message("R18.dev cache cleared.")
+
+    def _bind_log_context(self, func):
+        """Wraps func so it logs with the caller's per-file prefix and journal entry when run on another thread."""
+        prefix = getattr(self._log_context, 'prefix', '')
+        job_file = getattr(self._log_context, 'job_file', None)
+
+        def wrapper():
+            self._log_context.prefix, self._log_context.job_file = prefix, job_file
+            try:
+                return func()
+            finally:
+                self._log_context.prefix, self._log_context.job_file = '', None
+        return wrapper
+
+    def _journal(self, method, *args):
+        """Calls a JobJournal setter for the file this thread is processing; a no-op outside bulk runs."""
+        job_file = getattr(self._log_context, 'job_file', None)
+        if job_file:
+            getattr(self.job_journal, method)(*job_file, *args)
+
+    def _journal_decisions(self):
+        """Returns the decisions recorded for the file this thread is processing."""
+        job_file = getattr(self._log_context, 'job_file', None)
+        return self.job_journal.decisions(*job_file) if job_file else {}
+
+    @contextlib.contextmanager
+    def stage_span(self, stage, video_file=None, bytes_read=None):
+        """Times the enclosed block as a span of the current run; a no-op outside a run.
+
+        The stage is also remembered for the thread, so tool calls made inside it are
+        attributed to it.
+        """
+        previous = getattr(self._log_context, 'stage', None), getattr(self._log_context, 'video_file', None)
+        self._log_context.stage, self._log_context.video_file = stage, video_file
+        try:
+            if self.run_log is None:
+                yield {}
+            else:
+                with self.run_log.span(stage, video_file, bytes_read) as record:
+                    yield record
+        finally:
+            self._log_context.stage, self._log_context.video_file = previous
+
+    def timed_stage(self, stage, video_file, func, bytes_read=None):
+        """Wraps a stage function in a timing span; a False return is recorded as skipped."""
+        def wrapper():
+            self._journal('set_stage', stage, 'running')
+            try:
+                with self.stage_span(stage, video_file, bytes_read) as record:
+                    result = func()
+                    if result is False:
+                        record['outcome'] = 'skipped'
+            except BaseException:
+                self._journal('set_stage', stage, 'failed')
+                raise
+            self._journal('set_stage', stage, 'done')
+            return result
+        return self.profiled(wrapper)
+
+    def profiled(self, func):
+        """Returns func wrapped in the run's profiler when profiling is on, otherwise func itself."""
+        return self.profiler.wrap(func) if self.profiler else func
+
+    def run_tool(self, command, **kwargs):
+        """Runs an external tool like subprocess.run within the CPU budget, recording its CPU time and peak memory when profiling."""
+        tool = os.path.splitext(os.path.basename(command[0]))[0]
+        with self.cpu_budget.slot(*tool_cpu_request(tool, command)) as threads:
+            return run_tool(limit_tool_threads(tool, command, threads), on_finish=self._record_tool_call if self.profiler else None, **kwargs)
+
+    def _record_tool_call(self, command, wall_seconds, returncode, rusage):
+        record = {
+            'type': 'tool',
+            'tool': os.path.splitext(os.path.basename(command[0]))[0],
+            'stage': getattr(self._log_context, 'stage', None),
+            'file': os.path.basename(getattr(self._log_context, 'video_file', None) or '') or None,
+            'wall_ms': round(wall_seconds * 1000, 1),
+            'returncode': returncode,
+        }
+        if rusage is not None:
+            # ru_maxrss is in KiB on Linux and in bytes on macOS
+            max_rss = rusage.ru_maxrss / (MIB if sys.platform == 'darwin' else KIB)
+            record.update(user_cpu_s=round(rusage.ru_utime, 3), sys_cpu_s=round(rusage.ru_stime, 3), max_rss_mb=round(max_rss, 1))
+        with self._log_lock:
+            self._tool_calls.append(record)
+        if self.run_log is not None:
+            self.run_log.add(record)
+
+    def start_run_log(self):
+        self.run_started_at = time.time()
+        self.run_log = RunLog()
+        self._tool_calls = []
+        self.profiler = RunProfiler() if self.settings.profiling else None
+
+    def finish_run_log(self):
+        """Logs the per-stage timing summary of the run and where its JSON-lines log was written."""
+        if self.run_log is None or not self.run_log.spans:
+            return
+        self.log_message("\nStage timings:\n" + self.run_log.finish())
+        self.log_message(f"Run log: {self.run_log.path}")
+        if self.profiler:
+            self.finish_profile()
+
+    def finish_profile(self):
+        """Writes the run's pstats and a folded-stack file of tool time, and logs per-tool usage."""
+        profiler, self.profiler = self.profiler, None
+        base_path = os.path.join(os.path.abspath(PROFILE_DIR), self.run_log.run_id)
+        stats = profiler.dump(base_path + ".pstats")
+        if stats is not None:
+            self.log_message(f"Python profile: {base_path}.pstats (open with `python -m pstats`, snakeviz or flameprof)")
+
+        with self._log_lock:
+            tool_calls = list(self._tool_calls)
+        if not tool_calls:
+            return
+        # One "run;file;stage;tool milliseconds" line per call, the input format of flamegraph.pl and speedscope
+        folded = {}
+        usage = {}
+        for call in tool_calls:
+            stack = ";".join(["run", call['file'] or "-", call['stage'] or "-", call['tool']])
+            folded[stack] = folded.get(stack, 0) + call['wall_ms']
+            totals = usage.setdefault(call['tool'], {'calls': 0, 'wall_ms': 0, 'cpu_s': 0, 'max_rss_mb': 0})
+            totals['calls'] += 1
+            totals['wall_ms'] += call['wall_ms']
+            totals['cpu_s'] += call.get('user_cpu_s', 0) + call.get('sys_cpu_s', 0)
+            totals['max_rss_mb'] = max(totals['max_rss_mb'], call.get('max_rss_mb', 0))
+        try:
+            with open(base_path + ".tools.folded", 'w', encoding='utf-8') as f:
+                f.writelines(f"{stack} {int(round(ms))}\n" for stack, ms in sorted(folded.items()))
+        except OSError:
+            pass
+
+        lines = [f"{'Tool':<14}{'Calls':>7}{'Wall s':>9}{'CPU s':>9}{'Peak RSS MB':>13}"]
+        for tool, totals in sorted(usage.items(), key=lambda item: item[1]['wall_ms'], reverse=True):
+            lines.append(f"{tool:<14}{totals['calls']:>7}{totals['wall_ms'] / 1000:>9.2f}{totals['cpu_s']:>9.2f}{totals['max_rss_mb']:>13.1f}")
+        self.log_message("\nTool usage:\n" + "\n".join(lines))
+        self.log_message(f"Tool flame graph input: {base_path}.tools.folded")
+
+    def validate_api_key(self, api_key):
+        """Validate the API key by checking user information."""
+        try:
+            response = self.http.get(f"{CLEARJAV_API_BASE}/user", params={"api_token": api_key})
+            if response.status_code == 200:
+                user_data = response.json()
+                self.user_data = user_data
+                user_group = user_data.get('group', '').lower()
+                self.is_internal_user = user_group in ['internal', 'moderator', 'owner', 'mod']
+                self.upload_api_key = api_key
+                self.log_message(f"API Key validated. User: {user_data.get('username')}, Group: {user_data.get('group')}")
+                pending_uploads = self.upload_outbox.pending_count()
+                if pending_uploads:
+                    self.log_message(f"Resuming {pending_uploads} queued upload(s) from a previous session...")
+                    self.upload_outbox.start()
+                return True, user_data
+            else:
+                return False, None
+        except requests.RequestException as e:
+            self.log_message(f"API validation failed: {str(e)}")
+            return False, None
+
+    def check_for_duplicates(self, dvd_id, empty_fetched_after=None):
+        """Check if torrents with the same DVD ID already exist on ClearJAV.
+
+        Indexed empty results fetched before empty_fetched_after are not trusted and
+        the tracker is searched again; the check right before an upload passes the
+        run's start, so only searches of this run (e.g. the R18 prefetch) are reused.
+        """
+        indexed = self.duplicate_index.get(dvd_id, empty_fetched_after=empty_fetched_after)
+        if indexed is not None:
+            return indexed
+
+        api_url = f"{CLEARJAV_API_BASE}/torrents/filter"
+        search_methods = [
+            {'name': dvd_id},
+            {'description': dvd_id},
+            {'keywords': dvd_id}
+        ]
+
+        def search(search_params):
+            search_params['api_token'] = self.settings.api_key
+            response = self.http.get(api_url, params=search_params)
+            if response.status_code != 200:
+                return []
+            data = response.json()
+            if isinstance(data, dict):
+                return data.get('data', [])
+            elif isinstance(data, list):
+                return data
+            return []
+
+        # The three searches are independent, so they run concurrently and are merged by torrent ID
+        all_duplicates = {}
+        complete = True
+        with ThreadPoolExecutor(max_workers=len(search_methods)) as executor:
+            for future in [executor.submit(search, params) for params in search_methods]:
+                try:
+                    torrents = future.result()
+                except requests.RequestException as e:
+                    self.log_message(f"Error checking for duplicates: {str(e)}")
+                    complete = False
+                    continue
+                except json.JSONDecodeError as e:
+                    self.log_message(f"Error parsing duplicate check response: {str(e)}")
+                    complete = False
+                    continue
+
+                for torrent in torrents:
+                    if 'attributes' in torrent:
+                        torrent_name = torrent['attributes'].get('name', '').upper()
+                    else:
+                        torrent_name = torrent.get('name', '').upper()
+
+                    if dvd_id.upper() in torrent_name:
+                        all_duplicates.setdefault(torrent.get('id', torrent_name), torrent)
+
+        duplicates = list(all_duplicates.values())
+        if complete:
+            self.duplicate_index.put(dvd_id, duplicates)
+        return duplicates
+
+    def show_duplicate_confirmation_dialog(self, dvd_id, duplicates):
+        """Show dialog asking user if they want to proceed despite duplicates."""
+        with self._dialog_lock:
+            return self._show_duplicate_confirmation_dialog(dvd_id, duplicates)
+
+    def confirm_resume(self, folder, remaining, total):
+        """Asks whether to resume an interrupted bulk run with `remaining` of `total` files left."""
+        with self._dialog_lock:
+            return self._show_resume_dialog(folder, remaining, total)
+
+    def fetch_r18_data(self, jav_id):
+        """Fetch data from R18.dev API and validate content exists, using the local cache first."""
+        if not self.settings.r18_cache_bypass:
+            cached = self.r18_cache.get(jav_id)
+            if cached is not None:
+                if cached['exists']:
+                    self.log_message(f"  - R18.dev data for {jav_id} (cached): DVD ID='{cached['dvd_id'] or 'MISSING'}', Release Date='{cached['release_date'] or 'MISSING'}'")
+                else:
+                    self.log_message(f"  - Content ID {jav_id} not found on R18.dev (cached)")
+                return cached['dvd_id'], cached['release_date'], cached['exists']
+
+        lookup_state = {'resolved_id': None, 'error': False}
+        dvd_id, release_date, exists = self._lookup_r18_data(jav_id, lookup_state)
+        if exists or not lookup_state['error']:
+            self.r18_cache.put(jav_id, lookup_state['resolved_id'], dvd_id, release_date, exists)
+        return dvd_id, release_date, exists
+
+    def _lookup_r18_data(self, jav_id, lookup_state):
+        """Queries R18.dev for a content ID and its padded/unpadded variants."""
+        def try_api_call(content_id):
+            try:
+                api_url = f"{R18_API_BASE}/combined={content_id}/json"
+                
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Accept': 'application/json, text/plain, */*',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                    'Accept-Encoding': 'gzip, deflate',  # Avoid brotli to prevent decompression issues
+                    'Connection': 'keep-alive',
+                    'Referer': f'https://r18.dev/videos/vod/movies/detail/-/id={content_id}/',
+                }
+                
+                response = self.http.get(api_url, headers=headers)
+                if response.status_code == 200:
+                    data = response.json()
+                    
+                    if not data or data.get('error'):
+                        return None, None, False
+                    
+                    dvd_id = data.get('dvd_id')
+                    if dvd_id:
+                        dvd_id = dvd_id.strip()
+                    
+                    release_date = (data.get('release_date') or '').strip()
+                    
+                    self.log_message(f"  - R18.dev API response for {content_id}: DVD ID='{dvd_id or 'MISSING'}', Release Date='{release_date or 'MISSING'}'")
+                    lookup_state['resolved_id'] = content_id
+                    return dvd_id, release_date, True
+                elif response.status_code == 404:
+                    return None, None, False
+                else:
+                    lookup_state['error'] = True
+                    return None, None, False
+            except (requests.RequestException, json.JSONDecodeError):
+                lookup_state['error'] = True
+                return None, None, False
+        
+        dvd_id, release_date, exists = try_api_call(jav_id)
+        if exists:
+            return dvd_id, release_date, True
+        
+        match = re.match(r'^([a-zA-Z]+)(\d+)$', jav_id.lower())
+        if match:
+            letters, numbers = match.groups()
+            
+            # Try different padding options
+            for padding in [5, 3]:  # Try 5-digit padding first, then 3-digit
+                if len(numbers) < padding:
+                    padded_numbers = numbers.zfill(padding)
+                    padded_id = f"{letters}{padded_numbers}"
+                    
+                    if padded_id != jav_id.lower():
+                        self.log_message(f"  - Trying padded version: {padded_id}")
+                        dvd_id, release_date, exists = try_api_call(padded_id)
+                        if exists:
+                            return dvd_id, release_date, True
+        
+        match = re.match(r'^([a-zA-Z]+)0+(\d+)$', jav_id.lower())
+        if match:
+            letters, numbers = match.groups()
+            unpadded_id = f"{letters}{numbers}"
+            
+            if unpadded_id != jav_id.lower():
+                self.log_message(f"  - Trying unpadded version: {unpadded_id}")
+                dvd_id, release_date, exists = try_api_call(unpadded_id)
+                if exists:
+                    return dvd_id, release_date, True
+        
+        self.log_message(f"  - Content ID {jav_id} not found on R18.dev")
+        return None, None, False
+
+    def _read_mediainfo_file(self, mediainfo_path):
+        """Parses a saved MediaInfo .txt report into the track model."""
+        with open(mediainfo_path, 'r', encoding='utf-8') as f:
+            return MediaInfoReport.from_text(f.read())
+
+    def get_resolution_from_mediainfo(self, mediainfo_path):
+        """Extract resolution from MediaInfo file."""
+        try:
+            return self._read_mediainfo_file(mediainfo_path).resolution
+        except Exception as e:
+            self.log_message(f"Error reading MediaInfo: {str(e)}")
+            return "1080p"
+
+    def get_video_codec_from_mediainfo(self, mediainfo_path):
+        """Extract video codec from MediaInfo file and convert to simplified naming."""
+        try:
+            return self._read_mediainfo_file(mediainfo_path).video_codec
+        except Exception as e:
+            self.log_message(f"Error reading video codec: {str(e)}")
+            return "H.264"  # Default fallback
+
+    def get_audio_codec_from_mediainfo(self, mediainfo_path):
+        """Extract audio codec from MediaInfo file and convert to simplified naming."""
+        try:
+            return self._read_mediainfo_file(mediainfo_path).audio_codec
+        except Exception as e:
+            self.log_message(f"Error reading audio codec: {str(e)}")
+            return "AAC"
+
+    def construct_torrent_title(self, dvd_id, release_date, resolution, video_codec, audio_codec, is_internal=False, is_personal=False, custom_tag=""):
+        """Construct the torrent title according to the specified format."""
+        source = "DMM"
+        type_name = "WEB-DL"
+        
+        title_parts = [dvd_id, release_date, resolution, source, type_name, video_codec, audio_codec]
+        title = " ".join(title_parts)
+        
+        if is_internal:
+            title += "-ClearJAV"
+        elif is_personal and custom_tag:
+            title += f"-{custom_tag}"
+            
+        return title
+
+    def build_upload_fields(self, torrent_data):
+        """Collects the upload form fields from the torrent data and the current upload options."""
+        data = {
+            'jav_id': torrent_data['jav_id'],
+            'dvd_id': torrent_data['dvd_id'],
+            'name': torrent_data['title'],
+            'description': torrent_data['description'],
+            'mediainfo': torrent_data['mediainfo'],
+            'category_id': 1,
+            'type_id': 4,
+            'resolution_id': torrent_data['resolution_id'],
+            'anonymous': 1 if self.settings.anonymous_upload else 0,
+            'personal_release': 1 if self.settings.personal_release else 0,
+            'mod_queue_opt_in': 0 if self.settings.bypass_mod_queue else 1
+        }
+        
+        if self.is_internal_user:
+            data['internal'] = 1 if self.settings.internal_release else 0
+        return data
+
+    def send_upload(self, fields, torrent_path, contact_sheet_path=None):
+        """Posts an upload to ClearJAV, reading the .torrent and contact sheet straight from disk."""
+        data = dict(fields, api_token=self.upload_api_key)
+        with contextlib.ExitStack() as stack:
+            files = {'torrent': (os.path.basename(torrent_path), stack.enter_context(open(torrent_path, 'rb')), 'application/x-bittorrent')}
+            if contact_sheet_path and os.path.exists(contact_sheet_path):
+                files['thumb_sheets[]'] = (os.path.basename(contact_sheet_path), stack.enter_context(open(contact_sheet_path, 'rb')), 'image/jpeg')
+
+            MultipartEncoder = load_multipart_encoder()
+            if MultipartEncoder is not None:
+                encoder = MultipartEncoder(fields=[(key, str(value)) for key, value in data.items()] + list(files.items()))
+                return self.http.post(f"{CLEARJAV_API_BASE}/torrents/upload", data=encoder,
+                                      headers={'Content-Type': encoder.content_type}, timeout=HTTP_UPLOAD_TIMEOUT)
+            return self.http.post(f"{CLEARJAV_API_BASE}/torrents/upload", data=data, files=files, timeout=HTTP_UPLOAD_TIMEOUT)
+
+    def upload_torrent_to_api(self, torrent_data):
+        """Upload torrent to ClearJAV API."""
+        try:
+            response = self.send_upload(self.build_upload_fields(torrent_data), torrent_data['torrent_path'], torrent_data.get('contact_sheet_path'))
+            
+            if response.status_code in [200, 201]:
+                self.log_message("✓ Torrent uploaded successfully!")
+                return True
+            else:
+                self.log_message(f"✗ Upload failed. Status: {response.status_code}")
+                self.log_message(f"Response: {response.text}")
+                return False
+                
+        except (requests.RequestException, OSError) as e:
+            self.log_message(f"✗ Upload error: {str(e)}")
+            return False
+
+    def _send_outbox_job(self, job):
+        """Sends one queued upload for the outbox. Client errors other than timeouts/rate limits are permanent."""
+        with self.stage_span("upload", job['torrent_path']) as record:
+            try:
+                response = self.send_upload(job['fields'], job['torrent_path'], job['contact_sheet_path'])
+            except FileNotFoundError as e:
+                record['outcome'] = 'error'
+                return False, True, f"missing file: {e.filename}"
+            except (requests.RequestException, OSError) as e:
+                record['outcome'] = 'error'
+                return False, False, str(e)
+
+            if response.status_code in [200, 201]:
+                return True, False, ""
+            record['outcome'] = 'error'
+            permanent = 400 <= response.status_code < 500 and response.status_code not in (408, 429)
+            return False, permanent, f"status {response.status_code}: {response.text[:200]}"
+
+    def show_manual_input_dialog(self, jav_id, dvd_id=None, release_date=None, content_exists=True):
+        """Show dialog for manual input of missing data."""
+        with self._dialog_lock:
+            return self._show_manual_input_dialog(jav_id, dvd_id, release_date, content_exists)
+
+    def log_pending_uploads(self):
+        """Reports uploads that are still waiting in the outbox at the end of a run."""
+        pending_uploads = self.upload_outbox.pending_count()
+        if pending_uploads:
+            self.log_message(f"{pending_uploads} upload(s) still queued; they will keep being sent in the background.")
+
+    def run_single_generation(self, settings=None):
+        """Wrapper for running generation on a single file.
+
+        settings is the RunSettings snapshot to run with; without one it is taken here.
+        """
+        self.settings = settings or self.snapshot_settings()
+        try:
+            video_file = self.settings.input_path
+            self.log_message(f"Starting processing for: {os.path.basename(video_file)}")
+            self.start_run_log()
+            with self.stage_span("file", video_file) as record:
+                success = self.profiled(self.process_video_file)(video_file, is_bulk=False)
+                if not success:
+                    record['outcome'] = 'error'
+            self.finish_run_log()
+            if success:
+                self.log_message("\nProcessing finished successfully.")
+                self.log_pending_uploads()
+                self.finalize_processing(success_message="Success! All files generated.")
+            else:
+                self.finalize_processing(success_message="Finished with errors.")
+            return success
+        except Exception:
+            self.finalize_processing(success_message="An unexpected error occurred.")
+            return False
+
+    def get_bulk_worker_count(self):
+        """Returns the configured number of files processed in parallel during bulk runs."""
+        try:
+            return max(1, int(self.settings.bulk_workers))
+        except (ValueError, TypeError):
+            return DEFAULT_BULK_WORKERS
+
+    def start_r18_prefetch(self):
+        """Starts a background resolver for the content IDs of a folder run; feed it with queue_r18_prefetch.
+
+        At most R18_PREFETCH_CONCURRENCY lookups are in flight; process_video_file
+        picks up the results, so network latency overlaps with local processing.
+        Resolved DVD IDs are also checked for duplicates to warm the duplicate index.
+        Returns the executor, or None when uploads are disabled.
+        """
+        if not (self.settings.auto_upload and self.user_data):
+            return None
+        self._r18_prefetch = {}
+        self.log_message("Resolving content IDs on R18.dev in the background as files are found...")
+        return ThreadPoolExecutor(max_workers=R18_PREFETCH_CONCURRENCY)
+
+    def queue_r18_prefetch(self, executor, video_file):
+        """Queues the R18.dev lookup of a video's content ID unless it is already pending."""
+        jav_id = os.path.splitext(os.path.basename(video_file))[0]
+        if jav_id.lower() not in self._r18_prefetch:
+            self._r18_prefetch[jav_id.lower()] = executor.submit(self.profiled(self._prefetch_r18_data), jav_id)
+
+    def _prefetch_r18_data(self, jav_id):
+        self._log_context.prefix = f"[R18 {jav_id}] "
+        try:
+            with self.stage_span("r18_prefetch", jav_id):
+                dvd_id, release_date, exists = self.fetch_r18_data(jav_id)
+            # Warm the duplicate index too, so the per-file check is a local lookup
+            if exists and dvd_id and self.duplicate_index.enabled:
+                self.check_for_duplicates(dvd_id)
+            return dvd_id, release_date, exists
+        finally:
+            self._log_context.prefix = ''
+
+    def get_r18_data(self, jav_id):
+        """Returns R18.dev data for a content ID, waiting for a prefetched lookup when one exists."""
+        future = self._r18_prefetch.pop(jav_id.lower(), None)
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception:
+                pass  # Fall back to a direct lookup below
+        return self.fetch_r18_data(jav_id)
+
+    def run_bulk_generation(self, settings=None):
+        """Runs the generation process for all videos in a folder.
+
+        Files are handed to the workers while the folder scan is still running, at most
+        SCAN_LOOKAHEAD ahead of them, so work starts right away on large trees.
+        settings is the RunSettings snapshot to run with; without one it is taken here.
+        """
+        self.settings = settings or self.snapshot_settings()
+        try:
+            folder_path = os.path.abspath(self.settings.input_path)
+            # Journal entries keep the name a file had when the run started, even after renames
+            resumed = self._resume_interrupted_run(folder_path)
+            if resumed:
+                journal_names = resumed['remaining']
+                video_files = iter(journal_names)
+                position_offset = len(resumed['files'])
+                if not resumed['scan_done']:
+                    # Continue the scan the interrupted run did not finish, skipping files it already found
+                    known_names = {entry['name'] for entry in resumed['files']}
+                    known_paths = {entry['path'] for entry in resumed['files']}
+                    video_files = itertools.chain(video_files, (
+                        path for path in self.folder_scanner.scan(folder_path, recursive=self.settings.scan_subfolders)
+                        if path not in known_paths and os.path.relpath(path, folder_path) not in known_names))
+            else:
+                journal_names = {}
+                position_offset = 0
+                video_files = self.folder_scanner.scan(folder_path, recursive=self.settings.scan_subfolders)
+                self.job_journal.start(folder_path)
+
+            workers = self.get_bulk_worker_count()
+            self.log_message(f"Scanning {folder_path}{' and its subfolders' if self.settings.scan_subfolders else ''} "
+                             f"and processing with {workers} parallel worker(s)...")
+            scan = {'found': 0, 'processed': 0, 'done': False}
+
+            def progress_label(index):
+                return f"{index+1}/{scan['found']}" + ("" if scan['done'] else "+")
+
+            def process_one(index, video_file):
+                if workers > 1:
+                    self._log_context.prefix = f"[{progress_label(index)}] "
+                    self.log_message(f"Processing: {os.path.basename(video_file)}")
+                else:
+                    self.set_status(f"Processing {progress_label(index)}: {os.path.basename(video_file)}", "orange")
+                    self.log_message(f"\n[{progress_label(index)}] Processing: {os.path.basename(video_file)}")
+                self._log_context.job_file = (folder_path, journal_names.get(video_file) or os.path.relpath(video_file, folder_path))
+                self._journal('set_state', 'running')
+                try:
+                    with self.stage_span("file", video_file) as record:
+                        success = self.process_video_file(video_file, is_bulk=True)
+                        if not success:
+                            record['outcome'] = 'error'
+                            self.log_message(f"--> SKIPPED: {os.path.basename(video_file)} due to an error.")
+                    self._journal('set_state', 'done' if success else 'failed')
+                    return success
+                finally:
+                    self._log_context.prefix, self._log_context.job_file = '', None
+
+            self.start_run_log()
+            prefetch_executor = self.start_r18_prefetch()
+            running = {}
+            failed_files = []
+
+            def collect(futures):
+                for future in futures:
+                    index, video_file = running.pop(future)
+                    try:
+                        success = future.result()
+                    except Exception:
+                        success = False
+                    scan['processed'] += 1
+                    if not success:
+                        failed_files.append((index, os.path.basename(video_file)))
+                    if workers > 1:
+                        self.set_status(f"Processed {scan['processed']}/{scan['found']}{'' if scan['done'] else '+'} files...", "orange")
+                    self.set_progress(scan['processed'] / scan['found'])
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for index, video_file in enumerate(video_files):
+                    scan['found'] = index + 1
+                    if video_file not in journal_names:
+                        self.job_journal.add_file(folder_path, video_file, position_offset + index)
+                    if prefetch_executor:
+                        self.queue_r18_prefetch(prefetch_executor, video_file)
+                    # Bound the work queued ahead of the workers so memory stays flat on huge trees
+                    while len(running) >= workers + SCAN_LOOKAHEAD:
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    running[executor.submit(self.profiled(process_one), index, video_file)] = (index, video_file)
+                scan['done'] = True
+                self.job_journal.finish_scan(folder_path)
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            if prefetch_executor:
+                prefetch_executor.shutdown(wait=False, cancel_futures=True)
+                self._r18_prefetch = {}
+
+            self.job_journal.finish(folder_path)
+            total_files = scan['found']
+            if not total_files:
+                self.set_status("No video files found in the selected folder.", "orange")
+                self.finish_run_log()
+                self.finalize_processing()
+                return False
+
+            # Failures are listed in scan order so the summary does not depend on finish order
+            failed_files.sort()
+            self.log_message(f"\nBulk processing finished. {total_files - len(failed_files)}/{total_files} succeeded, {len(failed_files)} failed.")
+            for _, name in failed_files:
+                self.log_message(f"  - Failed: {name}")
+            self.finish_run_log()
+            self.log_pending_uploads()
+            self.finalize_processing(success_message="Bulk processing complete.")
+            return not failed_files
+        except Exception:
+            self.finalize_processing(success_message="An unexpected error occurred.")
+            return False
+
+    def run_watch(self, folders, stop_event, include_existing=False, stable_seconds=WATCH_STABLE_SECONDS,
+                  poll_interval=WATCH_POLL_SECONDS, settings=None):
+        """Watches folders until stop_event is set and processes every new video once it stopped growing.
+
+        Videos are processed by BulkWorkers threads as in a bulk run; a file being
+        processed when stop_event is set is finished first. Returns False when any file failed.
+        settings is the RunSettings snapshot to run with; without one it is taken here.
+        """
+        self.settings = settings or self.snapshot_settings()
+        watcher = FolderWatcher(folders, self.folder_scanner, recursive=self.settings.scan_subfolders,
+                                stable_seconds=stable_seconds, include_existing=include_existing)
+        workers = self.get_bulk_worker_count()
+        counts = {'processed': 0, 'failed': 0}
+        counts_lock = threading.Lock()
+        self.log_message(f"Watching {', '.join(watcher.folders)} with {workers} parallel worker(s). "
+                         f"New videos are processed once they have not changed for {stable_seconds:g}s.")
+        self.set_status("Watching for new videos...", "orange")
+        self.start_run_log()
+
+        def worker():
+            while not stop_event.is_set():
+                try:
+                    video_file = watcher.queue.get(timeout=1)
+                except queue.Empty:
+                    continue
+                if workers > 1:
+                    self._log_context.prefix = f"[{os.path.basename(video_file)}] "
+                self._log_context.on_renamed = watcher.renamed
+                try:
+                    self.log_message(f"\nNew video: {video_file}")
+                    with self.stage_span("file", video_file) as record:
+                        success = self.process_video_file(video_file, is_bulk=True)
+                        if not success:
+                            record['outcome'] = 'error'
+                except Exception:
+                    success = False
+                finally:
+                    self._log_context.prefix = ''
+                    self._log_context.on_renamed = None
+                with counts_lock:
+                    counts['processed'] += 1
+                    counts['failed'] += 0 if success else 1
+                    self.set_status(f"Watching... {counts['processed']} processed, {counts['failed']} failed, "
+                                    f"{watcher.queue.qsize()} waiting.", "orange")
+
+        threads = [threading.Thread(target=self.profiled(worker), daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        while not stop_event.is_set():
+            try:
+                queued = watcher.poll()
+            except OSError as e:
+                self.log_message(f"  - WARNING: Could not scan watched folders: {e}")
+                queued = 0
+            if queued:
+                self.log_message(f"Queued {queued} new video(s).")
+            stop_event.wait(poll_interval)
+        for thread in threads:
+            thread.join()
+
+        self.log_message(f"\nStopped watching. {counts['processed']} video(s) processed, {counts['failed']} failed.")
+        self.finish_run_log()
+        self.log_pending_uploads()
+        self.finalize_processing(success_message="Stopped watching.")
+        return not counts['failed']
+
+    def _resume_interrupted_run(self, folder_path):
+        """Returns the interrupted run of the folder when the user resumes it, otherwise None.
+
+        The result holds the journaled 'files', whether their 'scan_done' and the
+        'remaining' files as {path: journal name}. Files that finished or failed are not
+        processed again. Queued uploads are kept in the outbox and sent independently;
+        files whose upload was already queued do not queue it again.
+        """
+        run = self.job_journal.unfinished(folder_path)
+        if not run or not run['files']:
+            return None
+        entries = run['files']
+        remaining = [entry for entry in entries if entry['state'] in ('pending', 'running') and os.path.exists(entry['path'])]
+        if not remaining and run['scan_done']:
+            return None
+        if not self.confirm_resume(folder_path, len(remaining), len(entries)):
+            return None
+
+        done = sum(1 for entry in entries if entry['state'] == 'done')
+        failed = sum(1 for entry in entries if entry['state'] == 'failed')
+        self.log_message(f"Resuming interrupted run: {len(remaining)} of {len(entries)} file(s) found so far left "
+                         f"({done} done, {failed} failed){'' if run['scan_done'] else '; the folder scan continues where it stopped'}.")
+        queued_uploads = sum(1 for entry in entries
+                             if entry['decisions'].get('upload_job') and self.upload_outbox.is_pending(entry['decisions']['upload_job']))
+        if queued_uploads:
+            self.log_message(f"  - {queued_uploads} upload(s) from the interrupted run are still queued.")
+        return dict(run, remaining={entry['path']: entry['name'] for entry in remaining})
+
+    def get_quick_mediainfo(self, video_file):
+        """Gets the structured MediaInfo report used for torrent title construction."""
+        try:
+            return self._probe_mediainfo(video_file)
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"Failed to get MediaInfo data: {str(e)}")
+
+    def _probe_mediainfo(self, video_file):
+        """Returns the MediaInfo report of a video, running mediainfo only on a cache miss.
+
+        One run of mediainfo's text output serves both the .txt file and the fields
+        the torrent title is built from.
+        """
+        def probe():
+            command = [self.tool_paths['mediainfo'], video_file]
+            result = self.run_tool(command, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore',
+                                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+            return MediaInfoReport.from_text(result.stdout).to_dict()
+        return MediaInfoReport.from_dict(self.probe_cache.get(video_file, 'mediainfo_text_report', probe))
+
+    def _get_video_duration(self, video_file):
+        """Gets video duration in seconds using ffprobe."""
+        def probe():
+            duration_cmd = [self.tool_paths['ffprobe'], "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", video_file]
+            duration_result = self.run_tool(duration_cmd, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+            return float(duration_result.stdout.strip())
+
+        try:
+            return self.probe_cache.get(video_file, 'duration', probe)
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError) as e:
+            self.log_message(f"  - WARNING: Could not determine video duration. Using default settings. Error: {e}")
+            return 0
+
+    def _generate_mediainfo(self, video_file, output_path, video_filename):
+        """Generates the MediaInfo .txt file."""
+        options = {'complete_name': video_filename, 'output': 'text'}
+        if self._artifact_is_current(video_file, 'mediainfo', options, [output_path], "MediaInfo file"):
+            return False
+        self.log_message("  - Generating MediaInfo file...")
+        report = self._probe_mediainfo(video_file)
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(report.render_text(complete_name=video_filename))
+        self.manifest_for(video_file).record(video_file, 'mediainfo', options)
+
+    def _generate_contact_sheet(self, video_file, output_path):
+        """Generates the contact sheet using mtn, with custom settings for long videos."""
+        options = {'args': MTN_ARGS, 'long_video_args': MTN_LONG_VIDEO_ARGS, 'long_video_seconds': LONG_VIDEO_SECONDS}
+        if self._artifact_is_current(video_file, 'contact_sheet', options, [output_path], "Contact sheet"):
+            return False
+        self.log_message("  - Generating contact sheet...")
+
+        duration = self._get_video_duration(video_file)
+        is_long_video = duration > LONG_VIDEO_SECONDS
+
+        if is_long_video:
+            self.log_message("    - Long video detected (>4 hours). Using custom settings for contact sheet.")
+            mtn_command = [self.tool_paths['mtn']] + MTN_LONG_VIDEO_ARGS + [video_file]
+        else:
+            mtn_command = [self.tool_paths['mtn']] + MTN_ARGS + [video_file]
+
+        self.run_tool(mtn_command, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        self.manifest_for(video_file).record(video_file, 'contact_sheet', options)
+
+    def _generate_screenshots(self, video_file, output_dir):
+        """Generates screenshots using ffmpeg."""
+        if not self.settings.generate_screenshots:
+            return False
+        options = {'count': SCREENSHOT_COUNT, 'quality': SCREENSHOT_QUALITY}
+        output_paths = [os.path.join(output_dir, f"{i+1}.jpg") for i in range(SCREENSHOT_COUNT)]
+        if self._artifact_is_current(video_file, 'screenshots', options, [output_dir] + output_paths, "Screenshot folder"):
+            return False
+        self.log_message("  - Generating screenshots...")
+        os.makedirs(output_dir, exist_ok=True)
+
+        duration = self._get_video_duration(video_file)
+        if duration == 0:
+            self.log_message("    - Skipping screenshots due to inability to get video duration.")
+            return False
+
+        interval = duration / (SCREENSHOT_COUNT + 1)
+        timestamps = [interval * (i + 1) for i in range(SCREENSHOT_COUNT)]
+
+        if SCREENSHOT_SINGLE_PASS:
+            try:
+                ffmpeg_cmd = self._build_single_pass_screenshot_command(video_file, timestamps, output_paths)
+                self.run_tool(ffmpeg_cmd, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+                self.manifest_for(video_file).record(video_file, 'screenshots', options)
+                return
+            except subprocess.CalledProcessError:
+                self.log_message("    - Single-pass screenshot extraction failed. Falling back to one ffmpeg call per screenshot.")
+
+        for timestamp, output_path in zip(timestamps, output_paths):
+            ffmpeg_cmd = [self.tool_paths['ffmpeg'], "-ss", str(timestamp), "-i", video_file, "-vf", "scale=-1:1080", "-vframes", "1", "-q:v", str(SCREENSHOT_QUALITY), "-y", output_path]
+            self.run_tool(ffmpeg_cmd, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        self.manifest_for(video_file).record(video_file, 'screenshots', options)
+
+    def _build_single_pass_screenshot_command(self, video_file, timestamps, output_paths):
+        """Builds one ffmpeg command that writes a frame for every timestamp.
+
+        Each timestamp is opened as its own input with a fast input seek, so only the
+        frames around each position are decoded, and each input is mapped to its own
+        output file.
+        """
+        ffmpeg_cmd = [self.tool_paths['ffmpeg'], "-y"]
+        for timestamp in timestamps:
+            ffmpeg_cmd += ["-ss", str(timestamp), "-i", video_file]
+        for index, output_path in enumerate(output_paths):
+            # 'V' skips attached pictures such as embedded cover art
+            ffmpeg_cmd += ["-map", f"{index}:V:0", "-vf", "scale=-1:1080", "-frames:v", "1", "-q:v", str(SCREENSHOT_QUALITY), output_path]
+        return ffmpeg_cmd
+
+    def _create_torrent(self, video_file, output_path):
+        """Creates the .torrent file, hashing in-process and falling back to intermodal."""
+        tracker = self.settings.tracker_url
+        piece_length = self._get_piece_length(video_file)
+        options = {'announce': tracker, 'piece_length': piece_length, 'private': True}
+        if self._artifact_is_current(video_file, 'torrent', options, [output_path], ".torrent file"):
+            return False
+        self.log_message("  - Creating .torrent file...")
+        self.log_message(f"    - Piece length: {format_size(piece_length)}")
+
+        if TORRENT_ENGINE == "builtin":
+            try:
+                hash_share = max(1, int(self.cpu_budget.cores * TORRENT_HASH_CPU_SHARE))
+                with self.cpu_budget.slot(min(TORRENT_HASH_WORKERS, hash_share)) as hash_workers:
+                    create_torrent_file(video_file, output_path, tracker, piece_length=piece_length, workers=hash_workers,
+                                        progress_callback=self._make_hash_progress_logger())
+                self.manifest_for(video_file).record(video_file, 'torrent', options)
+                return
+            except (OSError, MemoryError) as e:
+                if INTERMODAL_EXE not in self.tool_paths:
+                    raise
+                self.log_message(f"    - Built-in hashing failed ({e}). Falling back to intermodal.")
+
+        intermodal_cmd = [self.tool_paths[INTERMODAL_EXE], "torrent", "create", "--input", video_file, "--announce", tracker, "--output", output_path, "--private", "--piece-length", f"{piece_length // KIB}KiB"]
+        self.run_tool(intermodal_cmd, check=True, capture_output=True, text=True, encoding='utf-8', errors='ignore', creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        self.manifest_for(video_file).record(video_file, 'torrent', options)
+
+    def _get_piece_length(self, video_file):
+        """Returns the piece length for a video from the size policy or the user override."""
+        content_size = os.path.getsize(video_file)
+        try:
+            return select_piece_length(content_size, self.settings.piece_length)
+        except ValueError as e:
+            self.log_message(f"    - {e}. Using automatic piece length.")
+            return select_piece_length(content_size)
+
+    def _make_hash_progress_logger(self):
+        """Returns a progress callback that logs hashing progress in 25% steps."""
+        state = {'next_step': 25}
+
+        def report(bytes_read, total_size):
+            percent = bytes_read * 100 // max(total_size, 1)
+            if percent >= state['next_step'] and percent < 100:
+                self.log_message(f"    - Hashing: {percent}%")
+                state['next_step'] = (percent // 25 + 1) * 25
+        return report
+
+    def process_video_file(self, video_file, is_bulk):
+        """Core logic for processing a single video file."""
+        base_dir = os.path.dirname(video_file)
+        video_filename = os.path.basename(video_file)
+        video_name_no_ext = os.path.splitext(video_filename)[0]
+        claimed_dvd_id = None
+
+        try:
+            # Decisions recorded by an interrupted bulk run of this file, reused instead of asking again
+            decisions = self._journal_decisions()
+            jav_id = decisions.get('content_id', video_name_no_ext)
+            self.log_message(f"  - Content ID: {jav_id}")
+            
+            dvd_id = None
+            release_date = None
+            torrent_title = None
+            final_video_file = video_file
+            
+            if self.settings.auto_upload and self.user_data:
+                if 'r18' in decisions:
+                    self.log_message("  - Using R18.dev data from the interrupted run...")
+                    dvd_id, release_date, exists = decisions['r18']
+                else:
+                    self.log_message("  - Fetching R18.dev data...")
+                    with self.stage_span("r18_lookup", video_file):
+                        dvd_id, release_date, exists = self.get_r18_data(jav_id)
+                
+                if not exists:
+                    if is_bulk:
+                        self.log_message(f"  - ❌ SKIPPED: Content ID {jav_id} not available on R18.dev")
+                        return False
+                    else:
+                        self.show_error_window("Content Not Found", 
+                                             f"Content ID '{jav_id}' is not available on R18.dev.\n\n"
+                                             f"This content cannot be uploaded to ClearJAV as it requires R18.dev metadata.\n"
+                                             f"Please verify the content ID is correct.")
+                        return False
+                
+                if not dvd_id or not release_date:
+                    missing_fields = []
+                    if not dvd_id:
+                        missing_fields.append("DVD ID")
+                    if not release_date:
+                        missing_fields.append("Release Date")
+                    
+                    self.log_message(f"  - Missing {', '.join(missing_fields)} from R18.dev, requesting manual input...")
+                    result = self.show_manual_input_dialog(jav_id, dvd_id, release_date, content_exists=True)
+                    if result['cancelled']:
+                        self.log_message("  - Processing cancelled by user")
+                        return False
+                    dvd_id = result['dvd_id']
+                    release_date = result['release_date']
+                self._journal('set_decision', 'content_id', jav_id)
+                self._journal('set_decision', 'r18', [dvd_id, release_date, exists])
+                
+                self.log_message(f"  - DVD ID: {dvd_id}")
+                self.log_message(f"  - Release Date: {release_date}")
+                
+                if decisions.get('duplicates') == 'proceed':
+                    self.log_message("  - Duplicate check already passed in the interrupted run")
+                    duplicates = []
+                else:
+                    self.log_message(f"  - Checking for existing torrents with DVD ID: {dvd_id}")
+                    with self.stage_span("duplicate_check", video_file):
+                        duplicates = self.check_for_duplicates(dvd_id, empty_fetched_after=self.run_started_at)
+
+                # Files of the same run with the same DVD ID (e.g. 4K and 1080p copies) would
+                # otherwise both pass the check before either upload is queued
+                with self._dvd_claims_lock:
+                    other_file = self._dvd_claims.get(dvd_id.upper())
+                    if other_file is None:
+                        claimed_dvd_id = dvd_id.upper()
+                        self._dvd_claims[claimed_dvd_id] = video_filename
+                if other_file is not None:
+                    duplicates = duplicates + [{'id': f"local:{other_file}", 'name': f"{other_file} (being processed in this run)"}]
+                
+                if duplicates:
+                    self.log_message(f"  - Found {len(duplicates)} existing torrent(s) with same DVD ID")
+                    
+                    if not self.show_duplicate_confirmation_dialog(dvd_id, duplicates):
+                        self.log_message("  - Upload cancelled due to duplicates")
+                        return False
+                    else:
+                        self.log_message("  - User chose to proceed despite duplicates")
+                elif decisions.get('duplicates') != 'proceed':
+                    self.log_message("  - No duplicates found, safe to proceed")
+                self._journal('set_decision', 'duplicates', 'proceed')
+                
+                self.log_message("  - Scanning MediaInfo for torrent title...")
+                try:
+                    with self.stage_span("title_probe", video_file):
+                        mediainfo_report = self.get_quick_mediainfo(video_file)
+                    resolution = mediainfo_report.resolution
+                    video_codec = mediainfo_report.video_codec
+                    audio_codec = mediainfo_report.audio_codec
+                    
+                    is_internal = self.settings.internal_release if self.is_internal_user else False
+                    is_personal = self.settings.personal_release
+                    custom_tag = self.settings.custom_tag.strip() if is_personal else ""
+                    
+                    torrent_title = self.construct_torrent_title(
+                        dvd_id, release_date, resolution, video_codec, audio_codec,
+                        is_internal, is_personal, custom_tag
+                    )
+                    
+                    self.log_message(f"  - Generated Torrent Title: {torrent_title}")
+                    
+                except Exception as e:
+                    self.log_message(f"  - Error getting MediaInfo for title: {str(e)}")
+                    return False
+                
+                # Handle file renaming based on filename mode
+                filename_mode = self.settings.filename_mode
+                if filename_mode != "content_id":
+                    self.log_message(f"  - Renaming file based on mode: {filename_mode}")
+                    
+                    if filename_mode == "dvd_id":
+                        new_name = dvd_id
+                    elif filename_mode == "torrent_title":
+                        new_name = torrent_title
+                    else:
+                        new_name = jav_id
+                    
+                    file_ext = os.path.splitext(video_file)[1]
+                    new_video_path = os.path.join(base_dir, f"{new_name}{file_ext}")
+                    
+                    if new_video_path != video_file:
+                        try:
+                            os.rename(video_file, new_video_path)
+                            self.probe_cache.rename(video_file, new_video_path)
+                            self.manifest_for(video_file).rename(video_file, new_video_path)
+                            self._journal('set_path', new_video_path)
+                            on_renamed = getattr(self._log_context, 'on_renamed', None)
+                            if on_renamed:
+                                on_renamed(video_file, new_video_path)
+                            final_video_file = new_video_path
+                            self.log_message(f"  - Renamed file to: {os.path.basename(new_video_path)}")
+                            
+                            video_filename = os.path.basename(final_video_file)
+                            video_name_no_ext = os.path.splitext(video_filename)[0]
+                        except OSError as e:
+                            self.log_message(f"  - Warning: Could not rename file: {str(e)}")
+            
+            mediainfo_txt_path = os.path.join(base_dir, f"{video_name_no_ext}.txt")
+            contact_sheet_path = os.path.join(base_dir, f"{video_name_no_ext}_s.jpg")
+            screenshot_dir = os.path.join(base_dir, video_name_no_ext)
+            torrent_path = os.path.join(base_dir, f"{video_name_no_ext}.torrent")
+
+            # The generators only read the video, so they run concurrently; the upload
+            # waits for every artifact it sends.
+            upload_result = {}
+            graph = StageGraph()
+            graph.add_stage("mediainfo", self._bind_log_context(self.timed_stage("mediainfo", final_video_file, lambda: self._generate_mediainfo(final_video_file, mediainfo_txt_path, video_filename))))
+            graph.add_stage("contact_sheet", self._bind_log_context(self.timed_stage("contact_sheet", final_video_file, lambda: self._generate_contact_sheet(final_video_file, contact_sheet_path))))
+            graph.add_stage("screenshots", self._bind_log_context(self.timed_stage("screenshots", final_video_file, lambda: self._generate_screenshots(final_video_file, screenshot_dir))))
+            graph.add_stage("torrent", self._bind_log_context(self.timed_stage("torrent", final_video_file, lambda: self._create_torrent(final_video_file, torrent_path),
+                                                                              bytes_read=os.path.getsize(final_video_file))))
+
+            if self.settings.auto_upload and self.user_data:
+                def upload():
+                    if decisions.get('upload_job'):
+                        self.log_message("  - Upload was already queued by the interrupted run. Skipping.")
+                        return False
+                    self.log_message("  - Queueing automatic upload...")
+                    with open(mediainfo_txt_path, 'r', encoding='utf-8') as f:
+                        mediainfo_content = f.read()
+                    
+                    # Prepare upload data
+                    torrent_data = {
+                        'jav_id': jav_id,
+                        'dvd_id': dvd_id,
+                        'title': torrent_title,
+                        'description': f"https://r18.dev/videos/vod/movies/detail/-/id={jav_id}/",
+                        'mediainfo': mediainfo_content,
+                        'resolution_id': RESOLUTION_MAPPINGS.get(resolution, 3),  # Default to 1080p
+                        'torrent_path': torrent_path,
+                        'contact_sheet_path': contact_sheet_path if os.path.exists(contact_sheet_path) else None
+                    }
+                    
+                    # Hand the upload to the background outbox so the next file can start right away
+                    job_id = self.upload_outbox.enqueue(torrent_title, self.build_upload_fields(torrent_data),
+                                                        torrent_data['torrent_path'], torrent_data['contact_sheet_path'])
+                    self._journal('set_decision', 'upload_job', job_id)
+                    self.duplicate_index.record_queued(dvd_id, torrent_title)
+                    upload_result['queued'] = True
+
+                graph.add_stage("upload", self._bind_log_context(self.timed_stage("upload_queue", final_video_file, upload)), depends_on=("mediainfo", "contact_sheet", "torrent"))
+
+            def on_stage_done(name, finished, total):
+                if not is_bulk: self.set_progress(0.9 * finished / total)
+
+            graph.run(on_stage_done=on_stage_done)
+
+            if upload_result.get('queued'):
+                self.log_message(f"--> SUCCESS: {video_filename} (queued for upload)")
+            else:
+                self.log_message(f"--> SUCCESS: {video_filename}")
+            
+            if not is_bulk: self.set_progress(1.0)
+            return True
+
+        except (FileNotFoundError, subprocess.CalledProcessError, Exception) as e:
+            error_title = "Processing Error"
+            error_details = ""
+            if isinstance(e, FileNotFoundError):
+                error_title = "Tool Not Found"
+                error_details = f"The command '{e.filename}' was not found."
+            elif isinstance(e, subprocess.CalledProcessError):
+                error_details = (
+                    f"Command:\n{' '.join(e.cmd)}\n\n"
+                    f"Return Code: {e.returncode}\n\n"
+                    f"--- STDOUT ---\n{e.stdout or 'No output'}\n\n"
+                    f"--- STDERR ---\n{e.stderr or 'No output'}"
+                )
+            else:
+                error_title = "Unexpected Error"
+                error_details = f"An unexpected error occurred.\n\n--- Traceback ---\n{traceback.format_exc()}"
+            
+            self.show_error_window(error_title, error_details)
+            if not is_bulk: self.set_progress(0)
+            return False
+        finally:
+            if claimed_dvd_id:
+                with self._dvd_claims_lock:
+                    self._dvd_claims.pop(claimed_dvd_id, None)
@@ -0,0 +1,52 @@
+import os
+
+from metadata_core import ArtifactManifest, bdecode, bencode, create_torrent_file, output_is_complete
+
+def make_video(tmp_path, size=300000):
+    video = tmp_path / "ABC-123.mkv"
+    video.write_bytes(os.urandom(size))
+    return str(video)
+
+def test_bdecode_reverses_bencode():
+    value = {'announce': "http://tracker/announce", 'info': {'length': 12, 'name': "a.mkv", 'files': [1, b"x"]}}
+    assert bdecode(bencode(value)) == {b'announce': b"http://tracker/announce",
+                                       b'info': {b'files': [1, b"x"], b'length': 12, b'name': b"a.mkv"}}
+
+def test_torrent_of_the_video_is_complete(tmp_path):
+    video = make_video(tmp_path)
+    torrent = str(tmp_path / "ABC-123.torrent")
+    create_torrent_file(video, torrent, "http://tracker/announce", piece_length=16384)
+    assert output_is_complete(torrent, os.path.getsize(video))
+    assert not output_is_complete(torrent, os.path.getsize(video) + 1)
+
+    with open(torrent, 'rb') as f:
+        data = f.read()
+    with open(torrent, 'wb') as f:
+        f.write(data[:-10])
+    assert not output_is_complete(torrent, os.path.getsize(video))
+
+def test_truncated_jpeg_is_incomplete(tmp_path):
+    image = tmp_path / "1.jpg"
+    image.write_bytes(b"\xff\xd8" + b"\x00" * 100 + b"\xff\xd9")
+    assert output_is_complete(str(image), 0)
+    image.write_bytes(b"\xff\xd8" + b"\x00" * 100)
+    assert not output_is_complete(str(image), 0)
+
+def test_manifest_tracks_options_and_content(tmp_path):
+    video = make_video(tmp_path)
+    output = tmp_path / "ABC-123.txt"
+    output.write_text("General")
+    manifest = ArtifactManifest(str(tmp_path))
+    assert not manifest.has_record(video, 'mediainfo')
+
+    manifest.record(video, 'mediainfo', {'complete_name': "ABC-123.mkv"})
+    assert manifest.has_record(video, 'mediainfo')
+    assert manifest.is_current(video, 'mediainfo', {'complete_name': "ABC-123.mkv"}, [str(output)])
+    assert not manifest.is_current(video, 'mediainfo', {'complete_name': "other.mkv"}, [str(output)])
+
+    # A reloaded manifest sees the same records
+    assert ArtifactManifest(str(tmp_path)).is_current(video, 'mediainfo', {'complete_name': "ABC-123.mkv"}, [str(output)])
+
+    with open(video, 'r+b') as f:
+        f.write(b"replaced")
+    assert not manifest.is_current(video, 'mediainfo', {'complete_name': "ABC-123.mkv"}, [str(output)])
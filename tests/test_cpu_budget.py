@@ -0,0 +1,65 @@
+import threading
+
+from metadata_core import CpuBudget, limit_tool_threads, tool_cpu_request
+
+def acquire_in_thread(budget, wanted, minimum=1):
+    """Starts acquire() on a thread; returns (thread, result list holding the granted cores)."""
+    granted = []
+    thread = threading.Thread(target=lambda: granted.append(budget.acquire(wanted, minimum)), daemon=True)
+    thread.start()
+    return thread, granted
+
+def screenshot_command(inputs=15):
+    command = ["ffmpeg"]
+    for i in range(inputs):
+        command += ["-ss", str(i), "-i", "video.mkv"]
+    return command + ["out.jpg"]
+
+def test_grants_up_to_wanted_and_at_least_minimum():
+    budget = CpuBudget(4)
+    assert budget.acquire(2) == 2
+    assert budget.acquire(8) == 2
+    budget.release(4)
+    assert budget.acquire(8, 8) == 4
+
+def test_waiters_are_served_in_arrival_order():
+    budget = CpuBudget(4)
+    budget.acquire(3)
+    big, big_granted = acquire_in_thread(budget, 4, 4)
+    big.join(0.2)
+    small, small_granted = acquire_in_thread(budget, 1)
+    small.join(0.2)
+    # One core is free, but the small request queued behind the big one
+    assert big_granted == [] and small_granted == []
+
+    budget.release(3)
+    big.join(5)
+    assert big_granted == [4]
+    budget.release(4)
+    small.join(5)
+    assert small_granted == [1]
+
+def test_screenshot_grab_does_not_wait_for_the_hasher():
+    budget = CpuBudget(8)
+    budget.acquire(1)  # a long hash holding a core for the whole run
+
+    screenshots, screenshot_granted = acquire_in_thread(budget, *tool_cpu_request("ffmpeg", screenshot_command()))
+    screenshots.join(5)
+    assert screenshot_granted == [7]
+
+    mediainfo, mediainfo_granted = acquire_in_thread(budget, *tool_cpu_request("mediainfo", ["mediainfo", "video.mkv"]))
+    mediainfo.join(0.2)
+    assert mediainfo_granted == []
+    # Later calls only wait for the screenshot grab, never for the hasher to finish
+    budget.release(screenshot_granted[0])
+    mediainfo.join(5)
+    assert mediainfo_granted == [1]
+
+def test_multi_input_ffmpeg_gets_one_decoder_thread_per_input():
+    command = limit_tool_threads("ffmpeg", screenshot_command(3), 8)
+    assert command.count("-threads") == 3
+    assert all(command[i + 1] == "1" for i, arg in enumerate(command) if arg == "-threads")
+
+def test_single_input_ffmpeg_gets_the_granted_threads():
+    assert limit_tool_threads("ffmpeg", ["ffmpeg", "-i", "video.mkv", "out.jpg"], 2) == ["ffmpeg", "-threads", "2", "-i", "video.mkv", "out.jpg"]
+    assert limit_tool_threads("mtn", ["mtn", "video.mkv"], 2) == ["mtn", "video.mkv"]
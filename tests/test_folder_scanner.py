@@ -0,0 +1,34 @@
+import os
+import time
+
+from metadata_core import FolderScanner, MIB
+
+def make_tree(root, files):
+    for relative_path, size, age in files:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+def scanned(root, scanner, recursive=False):
+    return [os.path.relpath(path, root).replace(os.sep, '/') for path in scanner.scan(str(root), recursive=recursive)]
+
+def test_only_videos_in_the_folder_by_default(tmp_path):
+    make_tree(tmp_path, [("b.mkv", 1, 0), ("A.MP4", 1, 0), ("notes.txt", 1, 0), ("sub/c.wmv", 1, 0)])
+    assert scanned(tmp_path, FolderScanner()) == ["A.MP4", "b.mkv"]
+
+def test_files_come_before_subfolders_walked_depth_first_in_name_order(tmp_path):
+    make_tree(tmp_path, [("z.mp4", 1, 0), ("a/2.mp4", 1, 0), ("a/b/1.mp4", 1, 0), ("c/3.mp4", 1, 0)])
+    assert scanned(tmp_path, FolderScanner(), recursive=True) == ["z.mp4", "a/2.mp4", "a/b/1.mp4", "c/3.mp4"]
+
+def test_exclude_matches_names_and_relative_paths(tmp_path):
+    make_tree(tmp_path, [("keep.mp4", 1, 0), ("sample.mp4", 1, 0), ("Extras/x.mp4", 1, 0), ("a/skip/y.mp4", 1, 0)])
+    scanner = FolderScanner(exclude=("SAMPLE*", "extras", "a/skip"))
+    assert scanned(tmp_path, scanner, recursive=True) == ["keep.mp4"]
+
+def test_size_and_age_limits(tmp_path):
+    make_tree(tmp_path, [("small.mp4", 10, 3600), ("big.mp4", 2 * MIB, 3600),
+                         ("fresh.mp4", MIB, 0), ("old.mp4", MIB, 10 * 86400), ("ok.mp4", MIB, 3600)])
+    scanner = FolderScanner(min_size=MIB // 2, max_size=1.5 * MIB, min_age=600, max_age=86400)
+    assert scanned(tmp_path, scanner) == ["ok.mp4"]
@@ -0,0 +1,64 @@
+import os
+
+from metadata_core import FolderScanner, FolderWatcher
+
+def write(path, size=10, mtime=None):
+    with open(path, 'wb') as f:
+        f.write(b"x" * size)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+def test_video_is_queued_once_it_stopped_growing(tmp_path):
+    watcher = FolderWatcher([str(tmp_path)], FolderScanner(), stable_seconds=30)
+    video = write(tmp_path / "ABC-123.mp4", mtime=1000)
+
+    assert watcher.poll(now=0) == 0
+    write(video, size=20, mtime=1001)
+    assert watcher.poll(now=20) == 0  # still growing: the debounce restarts
+    assert watcher.poll(now=40) == 0
+    assert watcher.poll(now=60) == 1
+    assert watcher.queue.get_nowait() == video
+    assert watcher.poll(now=120) == 0
+
+def test_existing_videos_are_ignored_unless_asked_for(tmp_path):
+    write(tmp_path / "ABC-123.mp4", mtime=1000)
+    assert FolderWatcher([str(tmp_path)], FolderScanner(), stable_seconds=0).poll(now=0) == 0
+
+    watcher = FolderWatcher([str(tmp_path)], FolderScanner(), stable_seconds=0, include_existing=True)
+    watcher.poll(now=0)
+    assert watcher.poll(now=1) == 1
+
+def test_renamed_video_is_not_queued_again(tmp_path):
+    watcher = FolderWatcher([str(tmp_path)], FolderScanner(), stable_seconds=0)
+    video = write(tmp_path / "abc00123.mp4", mtime=1000)
+    watcher.poll(now=0)
+    assert watcher.poll(now=1) == 1
+
+    renamed = str(tmp_path / "ABC-123.mp4")
+    os.rename(video, renamed)
+    watcher.renamed(video, renamed)
+    assert watcher.poll(now=2) == 0
+    assert watcher.poll(now=3) == 0
+
+def test_new_file_with_the_signature_of_a_processed_one_is_queued(tmp_path):
+    watcher = FolderWatcher([str(tmp_path)], FolderScanner(), stable_seconds=0)
+    write(tmp_path / "ABC-123.mp4", mtime=1000)
+    watcher.poll(now=0)
+    assert watcher.poll(now=1) == 1
+
+    write(tmp_path / "XYZ-999.mp4", mtime=1000)  # same size and mtime, different file
+    watcher.poll(now=2)
+    assert watcher.poll(now=3) == 1
+
+def test_state_of_removed_files_is_dropped(tmp_path):
+    watcher = FolderWatcher([str(tmp_path)], FolderScanner(), stable_seconds=30)
+    queued = write(tmp_path / "ABC-123.mp4", mtime=1000)
+    other = write(tmp_path / "XYZ-999.mp4", mtime=1000)
+    watcher.poll(now=0)
+    watcher.poll(now=30)
+    os.remove(queued)
+    os.remove(other)
+    write(tmp_path / "NEW-001.mp4", mtime=1000)
+    watcher.poll(now=31)
+    assert set(watcher._known) == set() and set(watcher._pending) == {str(tmp_path / "NEW-001.mp4")}
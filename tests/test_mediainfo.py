@@ -0,0 +1,38 @@
+from metadata_core import MediaInfoReport
+
+MEDIAINFO_TEXT = """General
+Complete name                            : /videos/ABC-123.mkv
+Format                                   : Matroska
+Movie name                               : ABC-123
+
+Video
+Format                                   : HEVC
+Width                                    : 3 840 pixels
+Height                                   : 2 160 pixels
+Display aspect ratio                     : 16:9
+
+Audio #1
+Format                                   : DTS XLL
+Commercial name                          : DTS-HD Master Audio
+
+Audio #2
+Format                                   : AAC LC
+"""
+
+def test_track_model_is_parsed_from_the_text_output():
+    report = MediaInfoReport.from_text(MEDIAINFO_TEXT)
+    assert [track.kind for track in report.tracks] == ["General", "Video", "Audio", "Audio"]
+    assert report.title == "ABC-123"
+    assert report.resolution == "2160p"
+    assert report.video_codec == "H.265"
+    assert report.audio_codec == "DTS-HD MA"
+
+def test_rendered_text_is_mediainfo_output_with_the_complete_name_replaced():
+    rendered = MediaInfoReport.from_text(MEDIAINFO_TEXT).render_text(complete_name="ABC-123.mkv")
+    assert rendered == MEDIAINFO_TEXT.strip().replace("/videos/ABC-123.mkv", "ABC-123.mkv")
+
+def test_cached_form_round_trips():
+    report = MediaInfoReport.from_text(MEDIAINFO_TEXT)
+    restored = MediaInfoReport.from_dict(report.to_dict())
+    assert restored.render_text() == report.render_text()
+    assert restored.video.height == 2160
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+from metadata_core import StageGraph
+
+def test_stages_run_after_their_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def stage(name):
+        def run():
+            with lock:
+                order.append(name)
+        return run
+
+    graph = StageGraph()
+    graph.add_stage("probe", stage("probe"))
+    graph.add_stage("mediainfo", stage("mediainfo"), depends_on=("probe",))
+    graph.add_stage("screenshots", stage("screenshots"), depends_on=("probe",))
+    graph.add_stage("upload", stage("upload"), depends_on=("mediainfo", "screenshots"))
+    done = []
+    graph.run(on_stage_done=lambda name, finished, total: done.append((name, finished, total)))
+
+    assert order[0] == "probe" and order[-1] == "upload"
+    assert [entry[1:] for entry in done] == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+def test_failure_is_raised_and_dependents_never_start():
+    started = []
+
+    def fail():
+        raise RuntimeError("mediainfo failed")
+
+    graph = StageGraph()
+    graph.add_stage("mediainfo", fail)
+    graph.add_stage("screenshots", lambda: started.append("screenshots"))
+    graph.add_stage("upload", lambda: started.append("upload"), depends_on=("mediainfo",))
+    with pytest.raises(RuntimeError, match="mediainfo failed"):
+        graph.run()
+    # Stages already running finish; stages depending on the failure do not start
+    assert started == ["screenshots"]
+
+def test_unknown_dependency_is_rejected():
+    graph = StageGraph()
+    with pytest.raises(ValueError):
+        graph.add_stage("upload", lambda: None, depends_on=("torrent",))
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from metadata_core import (INTERMODAL_EXE, KIB, bdecode, create_torrent_file, hash_pieces, intermodal_piece_length,
+                           parse_piece_length, select_piece_length)
+
+def reference_pieces(data, piece_length):
+    return b"".join(hashlib.sha1(data[offset:offset + piece_length]).digest() for offset in range(0, len(data), piece_length))
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "ABC-123.mkv"
+    path.write_bytes(os.urandom(3 * 1024 * 1024 + 12345))
+    return str(path)
+
+@pytest.mark.parametrize("workers", [1, 3, 32])
+@pytest.mark.parametrize("max_in_flight", [16 * KIB, 1024 * KIB, 256 * 1024 * KIB])
+def test_hash_pieces_matches_sha1_of_every_piece(video, workers, max_in_flight):
+    with open(video, 'rb') as f:
+        data = f.read()
+    assert hash_pieces(video, 64 * KIB, workers=workers, read_buffer=512 * KIB, max_in_flight=max_in_flight) == reference_pieces(data, 64 * KIB)
+
+def test_piece_larger_than_the_in_flight_limit(video):
+    with open(video, 'rb') as f:
+        data = f.read()
+    assert hash_pieces(video, 2048 * KIB, workers=4, max_in_flight=512 * KIB) == reference_pieces(data, 2048 * KIB)
+
+def test_torrent_has_intermodal_layout(video, tmp_path):
+    output = str(tmp_path / "ABC-123.torrent")
+    create_torrent_file(video, output, "http://tracker/announce", piece_length=256 * KIB, creation_date=1700000000, created_by="test")
+    with open(video, 'rb') as f:
+        data = f.read()
+    pieces = reference_pieces(data, 256 * KIB)
+    expected = (b"d8:announce23:http://tracker/announce10:created by4:test13:creation datei1700000000e8:encoding5:UTF-8"
+                b"4:infod6:lengthi%de4:name11:ABC-123.mkv12:piece lengthi262144e6:pieces%d:%s7:privatei1eee"
+                % (len(data), len(pieces), pieces))
+    with open(output, 'rb') as f:
+        assert f.read() == expected
+
+@pytest.mark.skipif(shutil.which(INTERMODAL_EXE) is None, reason="intermodal is not installed")
+def test_info_dictionary_matches_intermodal(video, tmp_path):
+    ours, theirs = str(tmp_path / "ours.torrent"), str(tmp_path / "theirs.torrent")
+    create_torrent_file(video, ours, "http://tracker/announce", piece_length=256 * KIB)
+    subprocess.run([INTERMODAL_EXE, "torrent", "create", "--input", video, "--announce", "http://tracker/announce",
+                    "--output", theirs, "--private", "--piece-length", "256KiB"], check=True, capture_output=True)
+    with open(ours, 'rb') as f:
+        ours = bdecode(f.read())
+    with open(theirs, 'rb') as f:
+        theirs = bdecode(f.read())
+    assert ours[b'info'] == theirs[b'info']
+    assert ours.keys() == theirs.keys()
+
+def test_piece_length_selection():
+    assert select_piece_length(100 * 1024 * KIB) == 256 * KIB
+    assert select_piece_length(3 * 1024 * 1024 * KIB) == 2048 * KIB
+    assert select_piece_length(100 * 1024 * KIB, "4 MiB") == 4096 * KIB
+    assert parse_piece_length("512KiB") == 512 * KIB
+    with pytest.raises(ValueError):
+        parse_piece_length("3 MiB")
+    assert intermodal_piece_length(1) == 16 * KIB